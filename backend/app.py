@@ -1,19 +1,103 @@
 import os
-import shutil
+import time
+import uuid
+import queue
+import threading
+import sqlite3
 import json
-from flask import Flask, request, jsonify
+import base64
+import tempfile
+import functools
+import importlib
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from flask import Flask, Request, request, jsonify, url_for, Response, stream_with_context, g
+from werkzeug.utils import secure_filename
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import insert, func, or_, and_, inspect, text, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta
 
 print("--- Starting Server Initialization ---")
 
-# --- Import all analyzer functions ---
-from image_analyzer import analyze_image_content
-from text_analyzer import analyze_text_content
-from audio_analyzer import analyze_audio_content
-from video_analyzer import analyze_video_from_url
-from video_analyzer_local import analyze_video_from_file
+import metrics
+from model_registry import registry, PRELOAD_MODELS
+from result_cache import ResultCache, canonicalize_url, normalize_text, hash_stream, make_cache_key, is_cacheable
+from jobs import JobRunner, QueueFull, current_worker_id, worker_is_gone
+from scratch import scratch_dir, new_scratch_dir, remove_scratch_dir
+from write_behind import WriteBehindRecorder
+
+# --- 🧩 Analyzers ---
+# Analyzers pull in torch, transformers, librosa, moviepy, OpenCV and the Gemini SDK, so each
+# one is imported by the first request that needs it rather than at startup.
+ANALYZER_MODULES = {
+    'Text': 'text_analyzer',
+    'Image': 'image_analyzer',
+    'Audio': 'audio_analyzer',
+    'Video': 'video_analyzer',
+}
+# Modalities this deployment serves; endpoints of the others answer 404.
+ENABLED_MODALITIES = {
+    name.strip().capitalize()
+    for name in os.getenv("ENABLED_MODALITIES", "text,image,audio,video").split(",")
+    if name.strip()
+}
+unknown_modalities = ENABLED_MODALITIES - set(ANALYZER_MODULES)
+if unknown_modalities:
+    raise ValueError(f"Unknown ENABLED_MODALITIES: {', '.join(sorted(unknown_modalities))}")
+
+def analyzer_module(analyzer):
+    """Imports (once) and returns the module behind an analyzer name such as 'Video'."""
+    return importlib.import_module(ANALYZER_MODULES[analyzer])
+
+def analyze_text_content(content):
+    return analyzer_module('Text').analyze_text_content(content)
+
+def analyze_image_content(filepath, use_index=True):
+    return analyzer_module('Image').analyze_image_content(filepath, use_index=use_index)
+
+def analyze_audio_content(filepath, progress=None):
+    return analyzer_module('Audio').analyze_audio_content(filepath, progress=progress)
+
+def analyze_video_from_url(url, progress=None, sections=None, events=None, cancel=None):
+    return analyzer_module('Video').analyze_video_from_url(url, progress=progress, sections=sections,
+                                                           events=events, cancel=cancel)
+
+def analyze_video_from_file(filepath, progress=None, events=None, cancel=None):
+    return importlib.import_module('video_analyzer_local').analyze_video_from_file(filepath, progress=progress,
+                                                                                   events=events, cancel=cancel)
+
+def requires_modality(analyzer):
+    """Answers 404 from an endpoint whose modality is not in ENABLED_MODALITIES."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if analyzer not in ENABLED_MODALITIES:
+                return jsonify({"error": f"{analyzer} analysis is not enabled on this server"}), 404
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def preload_models(warmup=True):
+    """Imports the enabled analyzers that own models, then loads (and warms up) those models."""
+    if 'Video' in ENABLED_MODALITIES:
+        analyzer_module('Video')
+    registry.preload(warmup=warmup)
+
+_preload_lock = threading.Lock()
+_preload_thread = None
+
+def start_background_preload():
+    """
+    Runs preload_models() on a background thread, once at a time per process. Under gunicorn
+    the server hooks preload; with `flask run` nothing does, so /ready starts it instead.
+    """
+    global _preload_thread
+    with _preload_lock:
+        if _preload_thread is None or not _preload_thread.is_alive():
+            _preload_thread = threading.Thread(target=preload_models, name="veritas-preload", daemon=True)
+            _preload_thread.start()
 
 # --- App Initialization ---
 app = Flask(__name__)
@@ -26,18 +110,24 @@ CORS(app,
      methods=["GET", "POST", "OPTIONS"],
      supports_credentials=True)
 
-# --- 📁 Upload Folder Configuration ---
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-
 # --- 🗄️ Database Configuration ---
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'veritas.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL", 'sqlite:///' + os.path.join(basedir, 'veritas.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; busy_timeout waits for the lock instead of failing."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-16000")
+        cursor.close()
+
 # --- 📝 Database Model ---
 class Analysis(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -45,154 +135,755 @@ class Analysis(db.Model):
     result = db.Column(db.String(50), nullable=False)
     confidence = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # JSON seconds-per-stage breakdown of the request that produced this row, for slow-request forensics.
+    timings = db.Column(db.Text)
+    reason = db.Column(db.Text)
+    # JSON of the analyzer's full "details" payload (per-frame scores, audio timeline, ...).
+    details = db.Column(db.Text)
 
-    def to_dict(self):
-        return {
+    __table_args__ = (
+        # Keyset pagination of /history, newest first, optionally filtered by type or result.
+        db.Index('ix_analysis_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_analysis_type_timestamp', 'analysis_type', 'timestamp'),
+        db.Index('ix_analysis_result_timestamp', 'result', 'timestamp'),
+        # Covers the /stats aggregates so they never touch the table itself.
+        db.Index('ix_analysis_type_result_confidence', 'analysis_type', 'result', 'confidence'),
+    )
+
+    def to_dict(self, include_details=False):
+        data = {
             'id': self.id,
             'analysis_type': self.analysis_type,
             'result': self.result,
             'confidence': self.confidence,
-            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+            'reason': self.reason,
+            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'timings': json.loads(self.timings) if self.timings else None
+        }
+        if include_details:
+            data['details'] = json.loads(self.details) if self.details else None
+        return data
+
+class CachedResult(db.Model):
+    key = db.Column(db.String(64), primary_key=True)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.Float, nullable=False, index=True)
+
+class Job(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    stage = db.Column(db.String(50))
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    worker_id = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'stage': self.stage,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
+# --- ♻️ Result Cache ---
+# Analyzer versions (ANALYZER_VERSION in each module) are part of every cache key,
+# so upgrading a model or prompt invalidates old verdicts.
+
+class SQLiteResultStore:
+    """Persistent tier of the result cache, stored in the CachedResult table."""
+
+    def get(self, key):
+        try:
+            entry = db.session.get(CachedResult, key)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Result cache lookup failed: {e}")
+            return None
+        if entry is None:
+            return None
+        return json.loads(entry.payload), entry.created_at
+
+    def put(self, key, result, created_at):
+        try:
+            # An upsert, because concurrent misses for the same content may race to store it.
+            payload = json.dumps(result)
+            db.session.execute(
+                sqlite_insert(CachedResult)
+                .values(key=key, payload=payload, created_at=created_at)
+                .on_conflict_do_update(index_elements=['key'], set_={'payload': payload, 'created_at': created_at})
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Result cache write failed: {e}")
+
+    def purge(self, before):
+        """Deletes entries created before `before`; reads already skip them, but they would pile up."""
+        try:
+            deleted = db.session.query(CachedResult).filter(CachedResult.created_at < before).delete()
+            db.session.commit()
+            if deleted:
+                print(f"Result cache purged {deleted} expired entries.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Result cache purge failed: {e}")
+
+result_cache = ResultCache(store=SQLiteResultStore())
+
+def request_flag(name):
+    """Reads a boolean option from the query string, a form field or the JSON body."""
+    flag = request.args.get(name) or request.form.get(name)
+    if flag is None and request.is_json:
+        flag = (request.get_json(silent=True) or {}).get(name)
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def cache_bypassed():
+    """True when the client asked to skip the cache with no_cache=1."""
+    return request_flag('no_cache')
+
+def text_material(content):
+    """Cache identity of a text submission: its canonical URL or its normalized text."""
+    if content.startswith("http://") or content.startswith("https://"):
+        return "url:" + canonicalize_url(content)
+    return "text:" + normalize_text(content)
+
+def cached_analysis(analyzer, material, run, bypass=False):
+    """Returns (result, served_from_cache), calling run() only on a cache miss."""
+    key = make_cache_key(analyzer, analyzer_module(analyzer).ANALYZER_VERSION, material)
+    if not bypass:
+        with metrics.span("cache_lookup"):
+            result = result_cache.get(key)
+        if result is not None:
+            metrics.CACHE_LOOKUPS.inc(analyzer=analyzer, outcome="hit")
+            return result, True
+    metrics.CACHE_LOOKUPS.inc(analyzer=analyzer, outcome="bypass" if bypass else "miss")
+    result = run()
+    if is_cacheable(result):
+        result_cache.put(key, result)
+    return result, False
+
+# --- 📊 Metrics ---
+# Store each request's per-stage timings on its Analysis row (see Analysis.timings).
+STORE_REQUEST_TIMINGS = os.getenv("STORE_REQUEST_TIMINGS", "1").lower() in ('1', 'true', 'yes')
+
+def _endpoint_label():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.metrics_token = metrics.start_breakdown()
+    metrics.REQUESTS_IN_FLIGHT.inc(endpoint=_endpoint_label())
+
+@app.after_request
+def observe_request_metrics(response):
+    endpoint = _endpoint_label()
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - g.metrics_started,
+                                    endpoint=endpoint, method=request.method, status=response.status_code)
+    if response.status_code >= 500:
+        metrics.ERRORS.inc(endpoint=endpoint)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    if 'metrics_token' in g:
+        metrics.REQUESTS_IN_FLIGHT.dec(endpoint=_endpoint_label())
+        metrics.end_breakdown(g.pop('metrics_token'))
+
+# --- 🧾 Analysis Records ---
+# Rows are queued and written in batches by a background thread instead of committing on the
+# request path. New rows show up in /history within RECORDER_FLUSH_SECONDS.
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "1").lower() in ('1', 'true', 'yes')
+
+def analysis_row(analysis_type, result):
+    """
+    The Analysis columns for a finished analysis, with the stage timings collected so far.
+    A failed analysis ({"error": ...}) is not recorded; its error is raised for the caller to return.
+    """
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    confidence = result['confidence'] if 'confidence' in result else result['overall_confidence']
+    details = result.get('details')
+    return {
+        "analysis_type": analysis_type,
+        "result": result['decision'],
+        "confidence": confidence,
+        "reason": result.get('reason'),
+        "details": json.dumps(details) if details is not None else None,
+        "timings": metrics.breakdown_json() if STORE_REQUEST_TIMINGS else None,
+        # Stamped now, not when the recorder gets round to writing it.
+        "timestamp": datetime.utcnow(),
+    }
+
+def write_analysis_rows(rows):
+    with app.app_context():
+        try:
+            db.session.execute(insert(Analysis), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+recorder = WriteBehindRecorder(write_analysis_rows) if WRITE_BEHIND else None
+
+def record_analysis(analysis_type, result):
+    record_rows([analysis_row(analysis_type, result)])
+
+def record_rows(rows):
+    if recorder is not None:
+        recorder.record(*rows)
+    else:
+        with metrics.span("db_commit"):
+            write_analysis_rows(rows)
+
+# --- 📁 Uploads ---
+# Uploads are spooled in memory and only spill to a temporary file above UPLOAD_SPOOL_BYTES.
+# Image and audio analyses decode straight from that stream; nothing is saved under its filename.
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(16 * 1024 ** 2)))
+# Size limits in bytes, checked against Content-Length before the body is read (and while
+# reading it, for chunked uploads). MAX_UPLOAD_BYTES applies to every other endpoint, e.g. batches.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(512 * 1024 ** 2)))
+UPLOAD_LIMITS = {
+    'handle_image_analysis': int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", str(32 * 1024 ** 2))),
+    'handle_audio_analysis': int(os.getenv("AUDIO_UPLOAD_MAX_BYTES", str(256 * 1024 ** 2))),
+    'handle_video_file_analysis': int(os.getenv("VIDEO_UPLOAD_MAX_BYTES", str(2 * 1024 ** 3))),
+}
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+
+class UploadRequest(Request):
+    """Applies the per-endpoint upload limit and spools uploads in memory."""
+
+    @property
+    def max_content_length(self):
+        limit = UPLOAD_LIMITS.get(self.endpoint)
+        return limit if limit is not None else super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="rb+")
+
+app.request_class = UploadRequest
+
+def format_size(size):
+    """1536 -> '1.5 KB', 33554432 -> '32 MB' (binary units, as the size limits are set)."""
+    for unit in ("bytes", "KB", "MB"):
+        if size < 1024:
+            return f"{round(size, 1):g} {unit}"
+        size /= 1024
+    return f"{round(size, 1):g} GB"
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    limit = request.max_content_length
+    if limit is None:
+        return jsonify({"error": "The upload is too large"}), 413
+    return jsonify({"error": f"The upload is larger than the {format_size(limit)} limit", "limit_bytes": limit}), 413
+
+def save_upload(file, workdir):
+    """Saves an upload into the request's own scratch directory, keeping its extension."""
+    filepath = os.path.join(workdir, secure_filename(file.filename) or "upload")
+    with metrics.span("upload_save"):
+        file.save(filepath)
+    return filepath
+
+# --- ⏳ Background Jobs ---
+# Long video/audio analyses can run here instead of holding a request worker; pass async=1.
+job_runner = JobRunner()
+
+
+def update_job(job_id, **fields):
+    job = db.session.get(Job, job_id)
+    for name, value in fields.items():
+        setattr(job, name, value)
+    db.session.commit()
+
+def submit_job(analysis_type, analyzer, material, run, workdir=None):
+    """Queues run(progress) on the worker pool and answers 202, or 429 when the queue is full."""
+    job = Job(id=uuid.uuid4().hex, job_type=analysis_type, status='queued', stage='queued', worker_id=current_worker_id())
+    db.session.add(job)
+    db.session.commit()
+    try:
+        job_runner.submit(run_job, job.id, analysis_type, analyzer, material, run, cache_bypassed(), workdir)
+    except QueueFull as e:
+        db.session.delete(job)
+        db.session.commit()
+        remove_scratch_dir(workdir)
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+    return jsonify({
+        "job_id": job.id,
+        "status": "queued",
+        "status_url": url_for('get_job', job_id=job.id)
+    }), 202
+
+def run_job(job_id, analysis_type, analyzer, material, run, bypass, workdir):
+    with app.app_context():
+        token = metrics.start_breakdown()
+        try:
+            update_job(job_id, status='running', stage='started')
+            progress = lambda stage: update_job(job_id, stage=stage)
+            result, cached = cached_analysis(analyzer, material, lambda: run(progress), bypass)
+            if 'error' in result:
+                raise RuntimeError(result['error'])
+            record_analysis(analysis_type, result)
+            update_job(job_id, status='done', stage='done', result=json.dumps({**result, "cached": cached}))
+        except Exception as e:
+            db.session.rollback()
+            update_job(job_id, status='failed', error=str(e))
+        finally:
+            metrics.end_breakdown(token)
+            remove_scratch_dir(workdir)
+
+# --- 📡 Streaming Video Analysis ---
+# With stream=1 the video endpoints answer with Server-Sent Events: "stage", "download",
+# "face" (the running verdict after every classified batch), "audio", then "result" or "error".
+STREAM_WORKERS = int(os.getenv("STREAM_WORKERS", "4"))
+# A keep-alive comment is sent this often; writing to a closed connection is how a disconnect is noticed.
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "1"))
+stream_pool = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="veritas-stream")
+
+def sse_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+def stream_video_analysis(analysis_type, material, run, workdir=None):
+    """
+    Runs run(progress, events, cancel) on stream_pool and relays what it reports as SSE.
+    When the client disconnects the cancel event is set, which stops decoding and inference.
+    """
+    events = queue.Queue()
+    cancel = threading.Event()
+    bypass = cache_bypassed()
+
+    def publish(name, data):
+        events.put((name, data))
+
+    def analyze():
+        with app.app_context():
+            try:
+                if cancel.is_set():  # the client left while this was still queued
+                    return
+                progress = lambda stage: publish("stage", {"stage": stage})
+                result, cached = cached_analysis('Video', material,
+                                                 lambda: _as_dict(run(progress, publish, cancel)), bypass)
+                record_analysis(analysis_type, result)
+                publish("result", {**result, "cached": cached})
+            except Exception as e:
+                if cancel.is_set():
+                    print(f"{analysis_type} analysis cancelled: the client disconnected.")
+                else:
+                    publish("error", {"error": str(e)})
+            finally:
+                remove_scratch_dir(workdir)
+                publish(None, None)
+
+    stream_pool.submit(metrics.propagate(analyze))
+
+    def generate():
+        try:
+            yield sse_event("stage", {"stage": "queued"})
+            while True:
+                try:
+                    name, data = events.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if name is None:
+                    return
+                yield sse_event(name, data)
+        finally:
+            # Also reached when the server closes the stream because the client went away.
+            cancel.set()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 # --- 🌐 API Endpoints ---
 
 @app.route('/analyze/text', methods=['POST'])
+@requires_modality('Text')
 def handle_text_analysis():
     data = request.json
     content = data.get('text') or data.get('url')
     if not content:
         return jsonify({"error": "No text or URL provided"}), 400
+    material = text_material(content)
     try:
-        result = analyze_text_content(content)
-        analysis_entry = Analysis(analysis_type='Text', result=result['decision'], confidence=result['confidence'])
-        db.session.add(analysis_entry)
-        db.session.commit()
-        return jsonify(result)
+        result, cached = cached_analysis('Text', material, lambda: analyze_text_content(content), cache_bypassed())
+        record_analysis('Text', result)
+        return jsonify({**result, "cached": cached})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/analyze/image', methods=['POST'])
+@requires_modality('Image')
 def handle_image_analysis():
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     file = request.files['file']
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
-    filepath = ""
     try:
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-        file.save(filepath)
-        result = analyze_image_content(filepath)
-        analysis_entry = Analysis(analysis_type='Image', result=result['decision'], confidence=result['confidence'])
-        db.session.add(analysis_entry)
-        db.session.commit()
-        return jsonify(result)
+        material = "sha256:" + hash_stream(file.stream)
+        bypass = cache_bypassed()
+        result, cached = cached_analysis('Image', material,
+                                         lambda: analyze_image_content(file.stream, use_index=not bypass), bypass)
+        record_analysis('Image', result)
+        return jsonify({**result, "cached": cached})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if filepath and os.path.exists(filepath):
-            os.remove(filepath)
 
 @app.route('/analyze/audio', methods=['POST'])
+@requires_modality('Audio')
 def handle_audio_analysis():
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     file = request.files['file']
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
-    filepath = ""
+    if request_flag('async'):
+        # The job outlives the request and its upload stream, so this one does go to disk.
+        material = "sha256:" + hash_stream(file.stream)
+        workdir = new_scratch_dir()
+        filepath = save_upload(file, workdir)
+        return submit_job('Audio', 'Audio', material,
+                          lambda progress: analyze_audio_content(filepath, progress=progress), workdir=workdir)
     try:
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-        file.save(filepath)
-        result = analyze_audio_content(filepath)
-        analysis_entry = Analysis(analysis_type='Audio', result=result['decision'], confidence=result['confidence'])
-        db.session.add(analysis_entry)
-        db.session.commit()
-        return jsonify(result)
+        material = "sha256:" + hash_stream(file.stream)
+        result, cached = cached_analysis('Audio', material, lambda: analyze_audio_content(file.stream),
+                                         cache_bypassed())
+        record_analysis('Audio', result)
+        return jsonify({**result, "cached": cached})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if filepath and os.path.exists(filepath):
-            os.remove(filepath)
 
 @app.route('/analyze/video-url', methods=['POST'])
+@requires_modality('Video')
 def handle_video_url_analysis():
     data = request.json
     url = data.get('url')
     if not url:
         return jsonify({"error": "No URL provided"}), 400
+    # Optional [[start, end], ...] seconds to download and analyze instead of the whole video.
+    from video_cache import normalize_sections
     try:
-        result = analyze_video_from_url(url)
-        result_dict = json.loads(result) if isinstance(result, str) else result
-        analysis_entry = Analysis(
-            analysis_type='Video (URL)',
-            result=result_dict['decision'],
-            confidence=result_dict['overall_confidence']
-        )
-        db.session.add(analysis_entry)
-        db.session.commit()
-        return jsonify(result_dict)
+        sections = normalize_sections(data.get('sections'))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid sections: {e}"}), 400
+    material = "url:" + canonicalize_url(url) + (f"#sections={json.dumps(sections)}" if sections else "")
+    if request_flag('async'):
+        return submit_job('Video (URL)', 'Video', material,
+                          lambda progress: _as_dict(analyze_video_from_url(url, progress=progress, sections=sections)))
+    if request_flag('stream'):
+        return stream_video_analysis('Video (URL)', material, lambda progress, events, cancel: analyze_video_from_url(
+            url, progress=progress, sections=sections, events=events, cancel=cancel))
+    try:
+        result_dict, cached = cached_analysis('Video', material,
+                                              lambda: _as_dict(analyze_video_from_url(url, sections=sections)),
+                                              cache_bypassed())
+        record_analysis('Video (URL)', result_dict)
+        return jsonify({**result_dict, "cached": cached})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/analyze/video-file', methods=['POST'])
+@requires_modality('Video')
 def handle_video_file_analysis():
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     file = request.files['file']
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-    file.save(filepath)
+    material = "sha256:" + hash_stream(file.stream)
+    if request_flag('async'):
+        workdir = new_scratch_dir()
+        filepath = save_upload(file, workdir)
+        return submit_job('Video (File)', 'Video', material,
+                          lambda progress: _as_dict(analyze_video_from_file(filepath, progress=progress)), workdir=workdir)
+    if request_flag('stream'):
+        workdir = new_scratch_dir()
+        filepath = save_upload(file, workdir)
+        return stream_video_analysis('Video (File)', material, lambda progress, events, cancel: analyze_video_from_file(
+            filepath, progress=progress, events=events, cancel=cancel), workdir=workdir)
     try:
-        result = analyze_video_from_file(filepath)
-        result_dict = json.loads(result) if isinstance(result, str) else result
-        analysis_entry = Analysis(
-            analysis_type='Video (File)',
-            result=result_dict['decision'],
-            confidence=result_dict['overall_confidence']
-        )
-        db.session.add(analysis_entry)
-        db.session.commit()
-        return jsonify(result_dict)
+        with scratch_dir() as workdir:
+            result_dict, cached = cached_analysis('Video', material,
+                                                  lambda: _as_dict(analyze_video_from_file(save_upload(file, workdir))), cache_bypassed())
+        record_analysis('Video (File)', result_dict)
+        return jsonify({**result_dict, "cached": cached})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+# --- 📦 Batch Analysis ---
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="veritas-batch")
+
+def prepare_batch_item(index, item, workdir):
+    """Validates one batch entry and returns (analysis_type, cache material, analysis callable)."""
+    kind = item.get('type')
+    analysis_type = 'Text' if kind == 'url' else str(kind).capitalize()
+    if kind in ('text', 'url', 'image', 'audio') and analysis_type not in ENABLED_MODALITIES:
+        raise ValueError(f"{analysis_type} analysis is not enabled on this server")
+    if kind in ('text', 'url'):
+        content = item.get('content') or item.get('text') or item.get('url')
+        if not content:
+            raise ValueError("No text or URL provided")
+        return 'Text', text_material(content), lambda: analyze_text_content(content)
+    if kind in ('image', 'audio'):
+        file = request.files.get(item.get('file') or '')
+        if file is None or file.filename == '':
+            raise ValueError(f"No file uploaded under the form field {item.get('file')!r}")
+        material = "sha256:" + hash_stream(file.stream)
+        item_dir = os.path.join(workdir, str(index))
+        os.makedirs(item_dir)
+        filepath = save_upload(file, item_dir)
+        if kind == 'image':
+            use_index = not cache_bypassed()
+            return 'Image', material, lambda: analyze_image_content(filepath, use_index=use_index)
+        return 'Audio', material, lambda: analyze_audio_content(filepath)
+    raise ValueError(f"Unsupported item type: {kind!r}")
+
+def run_batch_item(analysis_type, material, run, bypass):
+    with app.app_context():
+        try:
+            result, cached = cached_analysis(analysis_type, material, run, bypass)
+            return {"result": result, "cached": cached}
+        except Exception as e:
+            return {"error": str(e)}
+
+def batch_output(index, analysis_type, outcome):
+    if 'error' in outcome:
+        return {"index": index, "type": analysis_type, "error": outcome['error']}
+    return {"index": index, "type": analysis_type, **outcome['result'], "cached": outcome['cached']}
+
+def record_batch(outcomes):
+    """Records the Analysis rows of a whole batch together."""
+    rows = [
+        analysis_row(analysis_type, outcome['result'])
+        for analysis_type, outcome in outcomes
+        if 'decision' in outcome.get('result', {}) and 'confidence' in outcome['result']
+    ]
+    for row in rows:
+        # Batch items run on the pool threads, so the request's breakdown says nothing about them.
+        row["timings"] = None
+    if rows:
+        record_rows(rows)
+
+@app.route('/analyze/batch', methods=['POST'])
+def handle_batch_analysis():
+    """
+    Accepts {"items": [{"type": "text"|"url"|"image"|"audio", ...}]} as JSON, or the same
+    list in an `items` form field with files referenced by field name: {"type": "image", "file": "f1"}.
+    """
+    try:
+        items = (request.get_json() or {}).get('items') if request.is_json else json.loads(request.form.get('items', 'null'))
+    except ValueError:
+        return jsonify({"error": "The items field is not valid JSON"}), 400
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "No items provided"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"A batch may contain at most {BATCH_MAX_ITEMS} items"}), 400
+
+    bypass = cache_bypassed()
+    workdir = new_scratch_dir()
+    entries = []
+    for index, item in enumerate(items):
+        analysis_type = None
+        try:
+            analysis_type, material, run = prepare_batch_item(index, item if isinstance(item, dict) else {}, workdir)
+            future = batch_pool.submit(run_batch_item, analysis_type, material, run, bypass)
+        except ValueError as e:
+            future = Future()
+            future.set_result({"error": str(e)})
+        entries.append((index, analysis_type, future))
+
+    if request_flag('stream'):
+        def generate():
+            try:
+                by_future = {future: (index, analysis_type) for index, analysis_type, future in entries}
+                for future in as_completed(by_future):
+                    index, analysis_type = by_future[future]
+                    yield json.dumps(batch_output(index, analysis_type, future.result())) + "\n"
+                record_batch([(analysis_type, future.result()) for _, analysis_type, future in entries])
+            finally:
+                remove_scratch_dir(workdir)
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    try:
+        outcomes = [(index, analysis_type, future.result()) for index, analysis_type, future in entries]
+        record_batch([(analysis_type, outcome) for _, analysis_type, outcome in outcomes])
     finally:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-        if os.path.exists('temp_frames'):
-            shutil.rmtree('temp_frames')
-        if os.path.exists('temp_audio.wav'):
-            os.remove('temp_audio.wav')
+        remove_scratch_dir(workdir)
+    return jsonify({"results": [batch_output(*outcome) for outcome in outcomes]})
+
+def _as_dict(result):
+    return json.loads(result) if isinstance(result, str) else result
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status in ('queued', 'running') and worker_is_gone(job.worker_id):
+        # The process that owned this job died (e.g. a worker restart); it will never finish.
+        job.status = 'failed'
+        job.error = "The job was interrupted by a server restart. Please resubmit."
+        db.session.commit()
+    return jsonify(job.to_dict())
+
+# --- 📜 History & Stats ---
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 500
+
+def encode_cursor(analysis):
+    raw = json.dumps([analysis.timestamp.isoformat(), analysis.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    timestamp, analysis_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return datetime.fromisoformat(timestamp), int(analysis_id)
 
 @app.route('/history', methods=['GET'])
 def get_history():
-    analyses = Analysis.query.order_by(Analysis.timestamp.desc()).all()
-    return jsonify([a.to_dict() for a in analyses])
+    """
+    Newest-first history with keyset pagination: pass the returned next_cursor back as
+    ?cursor= to get the following page. Optional filters: type, result, since, until (ISO dates).
+    details=1 adds each analysis's full details payload.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', HISTORY_DEFAULT_LIMIT)), 1), HISTORY_MAX_LIMIT)
+        since = request.args.get('since')
+        until = request.args.get('until')
+        cursor = request.args.get('cursor')
+        query = Analysis.query
+        if request.args.get('type'):
+            query = query.filter(Analysis.analysis_type == request.args['type'])
+        if request.args.get('result'):
+            query = query.filter(Analysis.result == request.args['result'])
+        if since:
+            query = query.filter(Analysis.timestamp >= datetime.fromisoformat(since))
+        if until:
+            query = query.filter(Analysis.timestamp < datetime.fromisoformat(until))
+        if cursor:
+            timestamp, analysis_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                Analysis.timestamp < timestamp,
+                and_(Analysis.timestamp == timestamp, Analysis.id < analysis_id)
+            ))
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid limit, cursor or date filter"}), 400
+
+    # Fetch one extra row to learn whether another page exists.
+    analyses = query.order_by(Analysis.timestamp.desc(), Analysis.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(analyses[limit - 1]) if len(analyses) > limit else None
+    return jsonify({
+        "items": [a.to_dict(include_details=request_flag('details')) for a in analyses[:limit]],
+        "next_cursor": next_cursor
+    })
 
 @app.route('/stats', methods=['GET'])
 def get_stats():
-    total_analyses = Analysis.query.count()
-    real_analyses = Analysis.query.filter(Analysis.result.ilike('%real%')).all()
-    if real_analyses:
-        avg_confidence = sum(a.confidence for a in real_analyses) / len(real_analyses)
-    else:
-        avg_confidence = 0.94
+    """Totals, per-type and per-day breakdowns, all computed by SQL aggregates."""
+    try:
+        days = min(max(int(request.args.get('days', 30)), 1), 365)
+    except ValueError:
+        return jsonify({"error": "Invalid days"}), 400
+
+    # One pass over the covering index; there are only a handful of (type, result) pairs.
+    groups = db.session.query(
+        Analysis.analysis_type, Analysis.result, func.count(Analysis.id), func.sum(Analysis.confidence)
+    ).group_by(Analysis.analysis_type, Analysis.result).all()
+
+    total_analyses = sum(count for _, _, count, _ in groups)
+    real_count = sum(count for _, result, count, _ in groups if 'real' in result.lower())
+    real_confidence = sum(total for _, result, _, total in groups if 'real' in result.lower())
+    avg_confidence = real_confidence / real_count if real_count else 0.94
+
+    by_type = {}
+    for analysis_type, result, count, confidence_total in groups:
+        entry = by_type.setdefault(analysis_type, {"count": 0, "fake": 0, "confidenceTotal": 0.0})
+        entry["count"] += count
+        entry["confidenceTotal"] += confidence_total or 0.0
+        if 'fake' in result.lower():
+            entry["fake"] += count
+    for entry in by_type.values():
+        entry["averageConfidence"] = entry.pop("confidenceTotal") / entry["count"]
+
+    day = func.date(Analysis.timestamp)
+    fake = func.sum(db.case((Analysis.result.ilike('%fake%'), 1), else_=0))
+    daily = db.session.query(day, func.count(Analysis.id), fake) \
+        .filter(Analysis.timestamp >= datetime.utcnow() - timedelta(days=days)) \
+        .group_by(day).order_by(day).all()
+
     return jsonify({
         "totalAnalyses": total_analyses,
-        "accuracyRate": avg_confidence
+        "accuracyRate": avg_confidence,
+        "byType": by_type,
+        "byDay": [{"date": date, "count": count, "fake": fake_count or 0} for date, count, fake_count in daily]
     })
 
+@app.route('/ready', methods=['GET'])
+def get_readiness():
+    """
+    200 once every preloaded model is loaded, 503 before that; for load balancer health checks.
+    If no server hook has loaded the models yet, the first probe starts loading them.
+    """
+    if 'Video' in ENABLED_MODALITIES:
+        analyzer_module('Video')  # registers the video models
+    status = registry.status()
+    if not status["ready"]:
+        start_background_preload()
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/stats/gemini', methods=['GET'])
+def get_gemini_stats():
+    import gemini_client
+    return jsonify(gemini_client.stats())
+
 # --- 🛠️ Database CLI Command ---
+def ensure_columns():
+    """create_all() never alters existing tables, so add any columns added to Analysis since."""
+    table = Analysis.__table__
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    with db.engine.begin() as conn:
+        for column in table.columns:
+            if column.name not in existing:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} '
+                                  f'{column.type.compile(db.engine.dialect)}'))
+
+def ensure_indexes():
+    """create_all() skips tables that already exist, so add any indexes they are missing."""
+    for table in (Analysis.__table__, CachedResult.__table__):
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
 @app.cli.command("init-db")
 def init_db_command():
     """Initializes the database."""
     db.create_all()
+    ensure_columns()
+    ensure_indexes()
     print("Initialized the database.")
 
 # --- 🚀 Application Runner ---
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
-    app.run(debug=True, port=5000)
+        ensure_columns()
+        ensure_indexes()
+    if PRELOAD_MODELS:
+        preload_models()
+    # The reloader would start a second process and load every model twice.
+    app.run(debug=True, port=5000, use_reloader=not PRELOAD_MODELS)
@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from result_cache import canonicalize_url
+
+# lxml parses several times faster than the pure-Python html.parser; use it when installed.
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# --- CONFIGURATION ---
+ARTICLE_MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", str(5 * 1024 * 1024)))
+ARTICLE_TIMEOUT_SECONDS = float(os.getenv("ARTICLE_TIMEOUT_SECONDS", "10"))
+ARTICLE_CACHE_DIR = os.getenv("ARTICLE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "veritas-articles"))
+ARTICLE_CACHE_MAX_BYTES = int(os.getenv("ARTICLE_CACHE_MAX_BYTES", str(256 * 1024 ** 2)))
+# Within this window a cached article is served without contacting the site at all;
+# after it, the cache is revalidated with If-None-Match / If-Modified-Since.
+ARTICLE_CACHE_FRESH_SECONDS = int(os.getenv("ARTICLE_CACHE_FRESH_SECONDS", "600"))
+
+
+class ResponseTooLarge(Exception):
+    """Raised when a page exceeds ARTICLE_MAX_BYTES."""
+
+
+def extract_article_text(html, encoding=None):
+    """Joins the text of every <p> tag; only <p> subtrees are built, which keeps parsing cheap."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer("p"), from_encoding=encoding)
+    return " ".join(p.get_text() for p in soup.find_all("p"))
+
+
+class ArticleFetcher:
+    """
+    Fetches article text over a pooled session, with a size cap and an on-disk cache
+    that is kept under cache_max_bytes by evicting the least recently used articles.
+    """
+
+    def __init__(self, cache_dir=ARTICLE_CACHE_DIR, max_bytes=ARTICLE_MAX_BYTES,
+                 fresh_seconds=ARTICLE_CACHE_FRESH_SECONDS, timeout=ARTICLE_TIMEOUT_SECONDS,
+                 cache_max_bytes=ARTICLE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (compatible; VeritasBot/1.0)"
+        retries = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch_text(self, url):
+        entry = self._read_cache(url)
+        if entry and time.time() - entry["fetched_at"] < self.fresh_seconds:
+            self._touch(url)
+            return entry["text"]
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as resp:
+            if resp.status_code == 304 and entry:
+                entry["fetched_at"] = time.time()
+                self._write_cache(url, entry)
+                return entry["text"]
+            resp.raise_for_status()
+            body = self._read_body(resp)
+            # Only trust an explicit charset; otherwise let the parser sniff the document.
+            encoding = resp.encoding if "charset" in resp.headers.get("Content-Type", "").lower() else None
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+
+        text = extract_article_text(body, encoding)
+        self._write_cache(url, {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "text": text,
+        })
+        self._evict(keep=self._cache_path(url))
+        return text
+
+    def _read_body(self, resp):
+        declared = resp.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise ResponseTooLarge(f"Page is larger than {self.max_bytes} bytes.")
+        chunks, size = [], 0
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ResponseTooLarge(f"Page is larger than {self.max_bytes} bytes.")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _cache_path(self, url):
+        name = hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _read_cache(self, url):
+        try:
+            with open(self._cache_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, url, entry):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._cache_path(url))
+        except OSError as e:
+            print(f"Article cache write failed: {e}")
+
+    def _touch(self, url):
+        try:
+            os.utime(self._cache_path(url))  # mark as recently used
+        except OSError:
+            pass
+
+    def _evict(self, keep):
+        """Deletes least recently used articles until the cache fits in cache_max_bytes."""
+        entries = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.cache_max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass  # already evicted by another request
+
+
+_fetcher = ArticleFetcher()
+
+
+def fetch_article_text(url):
+    return _fetcher.fetch_text(url)
@@ -1,51 +1,131 @@
-import matplotlib
-matplotlib.use('Agg') # Set the non-GUI backend before importing pyplot
-import matplotlib.pyplot as plt
-import google.generativeai as genai
+from matplotlib import colormaps
 import librosa
-import librosa.display
 import numpy as np
+import soundfile as sf
 import json
+import math
 import re
 import os
+import io
+import shutil
+import tempfile
+from contextlib import contextmanager
 from PIL import Image
 
+import gemini_client
+import metrics
+
 # --- CONFIGURATION ---
-# ⚠️ IMPORTANT: Replace "YOUR_GEMINI_API_KEY" with your actual key.
-# For better security, it's recommended to load this from an environment variable.
-API_KEY = os.getenv("GEMINI_API_KEY", "YOUR_GEMINI_API_KEY") 
-genai.configure(api_key=API_KEY)
+# The API key, concurrency and rate limits are shared by all analyzers; see gemini_client.py.
+MODEL_NAME = "gemini-1.5-flash"
+# Bump the revision whenever the prompt changes so cached verdicts are not reused.
+ANALYZER_VERSION = f"{MODEL_NAME}:1"
 
 try:
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    print("✅ Gemini analysis model loaded successfully.")
+    model = gemini_client.get_model(MODEL_NAME)
+    if model is not None:
+        print("✅ Gemini analysis model loaded successfully.")
 except Exception as e:
     print(f"❌ Error loading Gemini model. Check your API key. Error: {e}")
     model = None
 
+# Size of the spectrogram image sent to Gemini. The default matches the old 10x4in figure.
+SPECTROGRAM_SIZE = (
+    int(os.getenv("SPECTROGRAM_WIDTH", "1000")),
+    int(os.getenv("SPECTROGRAM_HEIGHT", "400")),
+)
+
+# Files longer than this are rendered block by block, with time columns averaged down to
+# SPECTROGRAM_POOL_COLUMNS x the image width, instead of being decoded in one piece.
+SPECTROGRAM_STREAM_SECONDS = float(os.getenv("SPECTROGRAM_STREAM_SECONDS", "600"))
+SPECTROGRAM_POOL_COLUMNS = 4
+
+# 'magma' is the colormap librosa.display.specshow picks for dB spectrograms.
+SPECTROGRAM_LUT = (colormaps["magma"](np.linspace(0, 1, 256))[:, :3] * 255).astype(np.uint8)
+
+# --- Audio Sources ---
+def _rewound(source):
+    """File objects are read more than once (header, then samples); each read starts at the top."""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+@contextmanager
+def audio_source(audio):
+    """
+    Yields something librosa and soundfile can read: a path as is, or a file object (or bytes)
+    decoded straight from memory. Only formats libsndfile cannot decode (e.g. m4a), which
+    librosa has to hand to ffmpeg by path, are written to a temporary file.
+    """
+    if isinstance(audio, (str, os.PathLike)):
+        yield audio
+        return
+    if isinstance(audio, (bytes, bytearray)):
+        audio = io.BytesIO(audio)
+    try:
+        sf.info(_rewound(audio))
+    except RuntimeError:
+        with tempfile.NamedTemporaryFile(prefix="veritas-audio-") as spilled:
+            shutil.copyfileobj(_rewound(audio), spilled)
+            spilled.flush()
+            yield spilled.name
+        return
+    yield audio
+
 # --- Helper Function to Create Spectrogram ---
-def create_spectrogram(audio_path, output_path="temp_spectrogram.png"):
-    """Generates and saves a spectrogram image from an audio file."""
+def create_spectrogram(source, size=SPECTROGRAM_SIZE):
+    """Renders a mel-spectrogram of an audio file (path or file object) as an in-memory RGB image."""
     try:
-        y, sr = librosa.load(audio_path, sr=22050)
-        S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=256, fmax=8000)
+        if _duration(source) > SPECTROGRAM_STREAM_SECONDS:
+            S = streamed_melspectrogram(source, max_columns=SPECTROGRAM_POOL_COLUMNS * size[0])
+        else:
+            y, sr = librosa.load(_rewound(source), sr=22050)
+            S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=256, fmax=8000)
         S_dB = librosa.power_to_db(S, ref=np.max)
-
-        plt.figure(figsize=(10, 4))
-        librosa.display.specshow(S_dB, sr=sr, x_axis='time', y_axis='mel', fmax=8000)
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(output_path, bbox_inches='tight', pad_inches=0)
-        plt.close()
-        return output_path
+        return spectrogram_to_image(S_dB, size)
     except Exception as e:
         print(f"Error creating spectrogram: {e}")
         return None
 
+def _duration(source):
+    try:
+        return sf.info(_rewound(source)).duration
+    except RuntimeError:
+        # libsndfile cannot read it, so librosa.stream could not either; use the in-memory path.
+        return 0.0
+
+def streamed_melspectrogram(source, max_columns, n_fft=2048, hop_length=512):
+    """Mel power spectrogram computed one block at a time, with at most ~max_columns time columns."""
+    info = sf.info(_rewound(source))
+    sr = info.samplerate
+    pool = max(1, math.ceil(info.frames / hop_length / max_columns))
+    columns = []
+    blocks = librosa.stream(_rewound(source), block_length=pool * max(1, 4096 // pool), frame_length=n_fft,
+                            hop_length=hop_length)
+    for y in blocks:
+        if y.size < n_fft:
+            continue
+        S = librosa.feature.melspectrogram(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length, n_mels=256,
+                                           fmax=8000, center=False)
+        full = S.shape[1] // pool * pool
+        if full:
+            columns.append(S[:, :full].reshape(S.shape[0], -1, pool).mean(axis=2))
+        if S.shape[1] > full:
+            columns.append(S[:, full:].mean(axis=1, keepdims=True))
+    return np.hstack(columns)
+
+def spectrogram_to_image(S_dB, size=SPECTROGRAM_SIZE):
+    """Maps a dB spectrogram through the colormap, low frequencies at the bottom like specshow."""
+    low, high = S_dB.min(), S_dB.max()
+    scaled = (S_dB - low) / (high - low) if high > low else np.zeros_like(S_dB)
+    indices = np.flipud((scaled * 255).astype(np.uint8))
+    return Image.fromarray(SPECTROGRAM_LUT[indices]).resize(size, Image.BILINEAR)
+
 # --- Main Analysis Function ---
-def analyze_audio_content(audio_path: str):
+def analyze_audio_content(audio, progress=None):
     """
     Analyzes an audio file by creating a spectrogram and using the Gemini API.
+    audio is a path, a binary file object (e.g. an upload stream) or bytes.
     """
     if model is None:
         return {"error": "Gemini model is not available. Please check configuration."}
@@ -59,14 +139,15 @@ def analyze_audio_content(audio_path: str):
     {"decision": "Real/Fake", "confidence": 0.xx, "reason": "A brief explanation."}
     """
     
-    spectrogram_path = create_spectrogram(audio_path)
-    if not spectrogram_path:
+    if progress: progress("spectrogram")
+    with metrics.span("spectrogram"), audio_source(audio) as source:
+        img = create_spectrogram(source)
+    if img is None:
         return {"error": "Could not create a spectrogram from the audio file."}
 
     try:
-        # Using "with" ensures the image file is properly closed after use, fixing the error
-        with Image.open(spectrogram_path) as img:
-            response = model.generate_content([prompt, img])
+        if progress: progress("gemini")
+        response = model.generate_content([prompt, img])
 
         # Clean the response to extract only the JSON part
         json_text_match = re.search(r'\{.*\}', response.text, re.DOTALL)
@@ -82,13 +163,7 @@ def analyze_audio_content(audio_path: str):
             "reason": data.get("reason", "No reason provided.")
         }
 
-    except FileNotFoundError:
-        return {"error": "Spectrogram image not found."}
     except (json.JSONDecodeError, AttributeError):
         return {"error": "Failed to parse the model's JSON response.", "raw_response": response.text}
     except Exception as e:
         return {"error": f"An unexpected error occurred: {e}"}
-    finally:
-        # This cleanup step will now work because the file is no longer locked
-        if os.path.exists(spectrogram_path):
-            os.remove(spectrogram_path)
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Sustained Analysis insert throughput under N concurrent writers, comparing:
+
+    sync-default   one commit per row, SQLite's default rollback journal (the old path)
+    sync-wal       one commit per row, with the WAL pragmas app.py now sets
+    write-behind   rows queued to the WriteBehindRecorder and written in batches
+
+Each mode runs in its own process against a fresh database. Run from backend/:
+
+    python benchmarks/bench_analysis_writes.py --writers 16 --rows 200
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("sync-default", "sync-wal", "write-behind")
+
+RESULT = {
+    "decision": "Fake",
+    "overall_confidence": 0.91,
+    "reason": "Altered visual content (deepfake face) detected, but audio is authentic.",
+    "details": {"face_analysis": {"frame_scores": [{"frame": i, "label": "Fake", "score": 0.9} for i in range(32)]}},
+}
+
+
+def run_mode(mode, writers, rows):
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ["WRITE_BEHIND"] = "1" if mode == "write-behind" else "0"
+    os.environ["PRELOAD_MODELS"] = "0"
+    import app as veritas
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if mode == "sync-default":
+        event.remove(Engine, "connect", veritas.set_sqlite_pragmas)
+    with veritas.app.app_context():
+        veritas.db.create_all()
+
+    def writer(_):
+        errors = 0
+        with veritas.app.app_context():
+            for _ in range(rows):
+                try:
+                    veritas.record_analysis("Video (File)", RESULT)
+                except Exception:
+                    errors += 1
+        return errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        errors = sum(pool.map(writer, range(writers)))
+    accepted = time.perf_counter() - started
+    if veritas.recorder is not None:
+        veritas.recorder.close()  # wait until every queued row is on disk
+    elapsed = time.perf_counter() - started
+    with veritas.app.app_context():
+        stored = veritas.Analysis.query.count()
+    print(json.dumps({"mode": mode, "accepted_seconds": accepted, "elapsed": elapsed, "stored": stored, "errors": errors}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=200, help="rows written by each writer")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.writers, args.rows)
+        return
+
+    total = args.writers * args.rows
+    print(f"{args.writers} writers x {args.rows} rows")
+    print(f"{'mode':>13} {'rows/s':>9} {'request p/row ms':>17} {'stored':>7} {'errors':>7}")
+    for mode in MODES:
+        with tempfile.TemporaryDirectory(prefix="veritas-bench-") as workdir:
+            env = dict(os.environ, DATABASE_URL="sqlite:///" + os.path.join(workdir, "bench.db"))
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode,
+                 "--writers", str(args.writers), "--rows", str(args.rows)],
+                env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>13} {total / result['elapsed']:>9.0f} "
+                  f"{1000 * result['accepted_seconds'] * args.writers / total:>17.3f} "
+                  f"{result['stored']:>7} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
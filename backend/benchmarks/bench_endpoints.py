@@ -0,0 +1,249 @@
+"""
+Offline benchmark of every HTTP endpoint. Gemini (genai.GenerativeModel) and the HF video
+pipelines are replaced with deterministic stubs that sleep for a configurable latency,
+so no API key or model download is needed. Synthetic image, audio and video fixtures
+are generated, and each endpoint is driven through the Flask test client by a pool of
+concurrent clients. Reports p50/p95/p99 latency, throughput and peak RSS per endpoint.
+Run from backend/:
+
+    python benchmarks/bench_endpoints.py --concurrency 8 --requests 64 --output before.json
+    python benchmarks/bench_endpoints.py --output after.json --compare before.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from stress_concurrent_video import StubPipeline, make_fixture_video  # noqa: E402
+
+GEMINI_REPLY = '{"decision": "Real", "confidence": 0.87, "reason": "Stubbed Gemini verdict."}'
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGenerativeModel:
+    """Stands in for genai.GenerativeModel: same verdict every time, after `delay` seconds."""
+    delay = 0.0
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, contents, **kwargs):
+        time.sleep(self.delay)
+        return StubResponse(GEMINI_REPLY)
+
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if platform.system() == "Darwin" else peak * 1024
+
+
+class RssSampler:
+    """Tracks the peak resident set size while a block runs."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def make_fixtures(workdir):
+    from PIL import Image
+    import soundfile as sf
+
+    rng = np.random.default_rng(0)
+    image = io.BytesIO()
+    Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)).save(image, format="JPEG", quality=90)
+
+    audio = io.BytesIO()
+    t = np.arange(10 * 16000) / 16000
+    sf.write(audio, (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), 16000, format="WAV")
+
+    video_path = make_fixture_video(os.path.join(workdir, "fixture.mp4"), seconds=6)
+    with open(video_path, "rb") as f:
+        video = f.read()
+    return {"image": image.getvalue(), "audio": audio.getvalue(), "video": video, "video_path": video_path}
+
+
+def endpoint_requests(fixtures):
+    """name -> function(client, i) issuing one request and returning its status code."""
+    def upload(path, field_data, filename):
+        return lambda client, i: client.post(
+            f"{path}?no_cache=1", data={"file": (io.BytesIO(field_data), filename)},
+            content_type="multipart/form-data").status_code
+
+    def batch(client, i):
+        items = [{"type": "text", "content": f"Batch claim {i}-{n}"} for n in range(4)] + [{"type": "image", "file": "img"}]
+        return client.post("/analyze/batch?no_cache=1", data={
+            "items": json.dumps(items), "img": (io.BytesIO(fixtures["image"]), "photo.jpg"),
+        }, content_type="multipart/form-data").status_code
+
+    return {
+        "POST /analyze/text": lambda client, i: client.post(
+            "/analyze/text", json={"text": f"Claim number {i}: the moon is made of cheese.", "no_cache": True}).status_code,
+        "POST /analyze/image": upload("/analyze/image", fixtures["image"], "photo.jpg"),
+        "POST /analyze/audio": upload("/analyze/audio", fixtures["audio"], "voice.wav"),
+        "POST /analyze/video-file": upload("/analyze/video-file", fixtures["video"], "clip.mp4"),
+        "POST /analyze/video-url": lambda client, i: client.post(
+            "/analyze/video-url?no_cache=1", json={"url": "file://" + fixtures["video_path"]}).status_code,
+        "POST /analyze/batch": batch,
+        "GET /history": lambda client, i: client.get("/history?limit=50").status_code,
+        "GET /stats": lambda client, i: client.get("/stats").status_code,
+    }
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def run_endpoint(client, send, requests, concurrency):
+    def one(i):
+        started = time.perf_counter()
+        try:
+            status = send(client, i)
+        except Exception:
+            status = 599
+        return status, time.perf_counter() - started
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "requests": requests,
+        "errors": sum(1 for status, _ in results if status >= 400),
+        "throughput_rps": requests / wall,
+        "p50_ms": 1000 * percentile(latencies, 0.50),
+        "p95_ms": 1000 * percentile(latencies, 0.95),
+        "p99_ms": 1000 * percentile(latencies, 0.99),
+        "peak_rss_mb": rss.peak / 1024 ** 2,
+    }
+
+
+def print_report(results, baseline=None):
+    print(f"{'endpoint':<26} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rss MB':>8} {'errors':>7}"
+          + (f" {'p95 vs base':>12}" if baseline else ""))
+    for name, r in results.items():
+        line = (f"{name:<26} {r['throughput_rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                f"{r['p99_ms']:>8.1f} {r['peak_rss_mb']:>8.0f} {r['errors']:>7}")
+        base = (baseline or {}).get(name)
+        if base:
+            line += f" {100 * (r['p95_ms'] / base['p95_ms'] - 1):>+11.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=48, help="requests per endpoint")
+    parser.add_argument("--gemini-latency", type=float, default=0.3, help="seconds per stubbed Gemini call")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="seconds per stubbed pipeline call")
+    parser.add_argument("--endpoints", nargs="*", help="only run endpoints containing these substrings")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare p95 latency against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="veritas-bench-")
+    os.environ.update({
+        "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "bench.db"),
+        "SCRATCH_ROOT": os.path.join(workdir, "scratch"),
+        "VIDEO_CACHE_DIR": os.path.join(workdir, "videos"),
+        "ARTICLE_CACHE_DIR": os.path.join(workdir, "articles"),
+        "IMAGE_INDEX_PATH": os.path.join(workdir, "image_index.db"),
+        "VIDEO_ALLOW_FILE_URLS": "1",
+        "PRELOAD_MODELS": "0",
+        "GEMINI_API_KEY": "offline-benchmark",
+        # The benchmark measures the server, not the production quota.
+        "GEMINI_RATE_PER_SECOND": os.environ.get("GEMINI_RATE_PER_SECOND", "1000"),
+        "GEMINI_BURST": os.environ.get("GEMINI_BURST", "1000"),
+        "GEMINI_MAX_CONCURRENCY": os.environ.get("GEMINI_MAX_CONCURRENCY", str(args.concurrency * 4)),
+    })
+
+    import google.generativeai as genai
+    StubGenerativeModel.delay = args.gemini_latency
+    genai.GenerativeModel = StubGenerativeModel
+    genai.configure = lambda **kwargs: None
+
+    import app as veritas
+    import video_analyzer  # registers the models the stubs replace
+    from model_registry import registry
+    registry.set("face_detector", StubPipeline("Real", args.model_latency))
+    registry.set("audio_detector", StubPipeline("bonafide", args.model_latency))
+    with veritas.app.app_context():
+        veritas.db.create_all()
+
+    try:
+        fixtures = make_fixtures(workdir)
+        client = veritas.app.test_client()
+        results = {}
+        for name, send in endpoint_requests(fixtures).items():
+            if args.endpoints and not any(part in name for part in args.endpoints):
+                continue
+            send(client, -1)  # warm-up
+            results[name] = run_endpoint(client, send, args.requests, args.concurrency)
+            print(f"  {name}: done", file=sys.stderr)
+    finally:
+        if veritas.recorder is not None:
+            veritas.recorder.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["endpoints"]
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat() + "Z",
+                "python": platform.python_version(),
+                "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+                "endpoints": results,
+            }, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
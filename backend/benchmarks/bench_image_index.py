@@ -0,0 +1,135 @@
+"""
+Image pre-processing and near-duplicate index benchmark, offline.
+
+1. Upload size and time of the pre-processing stage for a large photo (or a synthetic
+   12-megapixel image), and the perceptual-hash distance of resized/re-encoded copies.
+2. Lookup latency and recall of the multi-index Hamming search over --hashes stored hashes,
+   queried with stored hashes that have up to IMAGE_MATCH_DISTANCE random bits flipped,
+   against a brute-force numpy scan of the same hashes.
+Run from backend/:
+
+    python benchmarks/bench_image_index.py --hashes 1000000 --image photo.jpg
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from image_index import PerceptualIndex, phash, hamming, HASH_BITS  # noqa: E402
+
+VERSION = "bench"
+
+
+def synthetic_photo(width=4000, height=3000):
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, width)[None, :, None]
+    y = np.linspace(0, 1, height)[:, None, None]
+    pixels = 255 * (0.5 + 0.25 * np.sin(6 * x + np.array([0, 1, 2])) * np.cos(4 * y))
+    pixels += rng.normal(0, 12, (height, width, 3))  # sensor noise, as in a real photo
+    img = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((1200, 700, 2800, 2300), fill=(200, 60, 40))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def bench_preprocessing(original_bytes, workdir):
+    import image_analyzer
+
+    path = os.path.join(workdir, "photo")
+    with open(path, "wb") as f:
+        f.write(original_bytes)
+    started = time.perf_counter()
+    img = Image.open(path)
+    img.load()
+    blob, image_hash = image_analyzer.prepare_image(img, path)
+    elapsed = time.perf_counter() - started
+    print(f"pre-processing: {img.size[0]}x{img.size[1]} {len(original_bytes) / 1024:.0f} KiB -> "
+          f"{len(blob['data']) / 1024:.0f} KiB {blob['mime_type']} in {1000 * elapsed:.0f} ms")
+
+    variants = {
+        "resized to 800px": lambda im: im.resize((800, round(800 * im.height / im.width))),
+        "JPEG quality 60": lambda im: Image.open(_encode(im, quality=60)),
+        "cropped 2%": lambda im: im.crop((im.width // 50, im.height // 50, im.width, im.height)),
+        "brightened": lambda im: im.point(lambda v: min(255, int(v * 1.15))),
+    }
+    for name, transform in variants.items():
+        print(f"  hash distance, {name}: {hamming(image_hash, phash(transform(img.convert('RGB'))))}")
+
+
+def _encode(img, quality):
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    buffer.seek(0)
+    return buffer
+
+
+def bench_index(count, queries, max_distance, workdir):
+    rng = np.random.default_rng(1)
+    hashes = rng.integers(0, 2 ** 63, count, dtype=np.uint64) * np.uint64(2) + rng.integers(0, 2, count, dtype=np.uint64)
+    index = PerceptualIndex(os.path.join(workdir, "index.db"))
+    started = time.perf_counter()
+    result = {"decision": "Real", "confidence": 0.9, "reason": "benchmark"}
+    for start in range(0, count, 50000):
+        index.add_many([(int(h), VERSION, result) for h in hashes[start:start + 50000]])
+    print(f"index: inserted {count} hashes in {time.perf_counter() - started:.1f}s")
+
+    targets = rng.choice(count, queries, replace=False)
+    probes = []
+    for target in targets:
+        flipped = int(hashes[target])
+        for bit in rng.choice(HASH_BITS, rng.integers(0, max_distance + 1), replace=False):
+            flipped ^= 1 << int(bit)
+        probes.append(flipped)
+
+    latencies, found = [], 0
+    for probe in probes:
+        started = time.perf_counter()
+        match = index.lookup(probe, VERSION, max_distance)
+        latencies.append(time.perf_counter() - started)
+        found += match is not None
+    latencies.sort()
+
+    started = time.perf_counter()
+    for probe in probes[:20]:
+        distances = np.unpackbits((hashes ^ np.uint64(probe)).view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+        distances.min()
+    scan = (time.perf_counter() - started) / min(20, len(probes))
+
+    print(f"  lookups within {max_distance} bits: recall {found}/{len(probes)}, "
+          f"p50 {1000 * latencies[len(latencies) // 2]:.2f} ms, p95 {1000 * latencies[int(0.95 * (len(latencies) - 1))]:.2f} ms; "
+          f"numpy full scan {1000 * scan:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="photo to pre-process (default: a synthetic 12-megapixel JPEG)")
+    parser.add_argument("--hashes", type=int, default=1000000, help="hashes stored in the index")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--max-distance", type=int, default=None, help="default: IMAGE_MATCH_DISTANCE")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="veritas-image-index-") as workdir:
+        os.environ.setdefault("IMAGE_INDEX_PATH", os.path.join(workdir, "analyzer-index.db"))
+        import image_analyzer
+        if args.image:
+            with open(args.image, "rb") as f:
+                original = f.read()
+        else:
+            original = synthetic_photo()
+        bench_preprocessing(original, workdir)
+        max_distance = image_analyzer.IMAGE_MATCH_DISTANCE if args.max_distance is None else args.max_distance
+        bench_index(args.hashes, args.queries, max_distance, workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Parity and throughput check for the inference backends in inference_backend.py.
+Every candidate backend is run on the same fixtures as the fp32 torch pipelines and
+reported as label agreement, top-score deltas, frames per second and seconds of
+audio per second. Run from backend/:
+
+    python benchmarks/bench_inference_backend.py --backends int8 onnx
+    python benchmarks/bench_inference_backend.py --images fixtures/faces --audio fixtures/clips/*.wav
+
+Without --images / --audio, synthetic frames and tones are used; they are fine for
+throughput, but parity should be judged on real faces and speech.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def load_images(folder, count, size=224):
+    if folder:
+        paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith((".jpg", ".jpeg", ".png")))
+        return [Image.open(p).convert("RGB") for p in paths[:count]]
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, size, dtype=np.float32)
+    images = []
+    for i in range(count):
+        frame = np.stack([np.add.outer(gradient, gradient) / 2, np.full((size, size), 8.0 * i), gradient[None, :].repeat(size, 0)], -1)
+        frame += rng.normal(0, 20, frame.shape)
+        images.append(Image.fromarray(np.clip(frame, 0, 255).astype(np.uint8)))
+    return images
+
+
+def load_audio(paths, count, sample_rate, seconds=5):
+    if paths:
+        import librosa
+        return [librosa.load(p, sr=sample_rate, mono=True)[0] for p in paths[:count]]
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return [(0.3 * np.sin(2 * np.pi * (150 + 40 * i) * t) + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+            for i in range(count)]
+
+
+def top(preds):
+    best = max(preds, key=lambda p: p["score"])
+    return best["label"], best["score"]
+
+
+def run_images(pipe, images, batch_size):
+    started = time.perf_counter()
+    preds = pipe(images, batch_size=batch_size)
+    return [top(p) for p in preds], len(images) / (time.perf_counter() - started)
+
+
+def run_audio(pipe, clips, sample_rate):
+    started = time.perf_counter()
+    preds = [pipe({"raw": clip, "sampling_rate": sample_rate}) for clip in clips]
+    audio_seconds = sum(len(clip) for clip in clips) / sample_rate
+    return [top(p) for p in preds], audio_seconds / (time.perf_counter() - started)
+
+
+def parity(reference, candidate):
+    agree = sum(r[0] == c[0] for r, c in zip(reference, candidate)) / len(reference)
+    deltas = [abs(r[1] - c[1]) for r, c in zip(reference, candidate)]
+    return agree, float(np.mean(deltas)), float(np.max(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["int8", "onnx"], help="candidates compared with fp32 torch")
+    parser.add_argument("--images", help="folder of face images (default: synthetic frames)")
+    parser.add_argument("--audio", nargs="*", help="audio files (default: synthetic tones)")
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--clips", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--face-model", help="override the face model id or local path")
+    parser.add_argument("--audio-model", help="override the audio model id or local path")
+    args = parser.parse_args()
+
+    import inference_backend
+    from video_analyzer import FACE_MODEL_ID, AUDIO_MODEL_ID, AUDIO_SAMPLE_RATE
+
+    face_model = args.face_model or FACE_MODEL_ID
+    audio_model = args.audio_model or AUDIO_MODEL_ID
+    images = load_images(args.images, args.frames)
+    clips = load_audio(args.audio, args.clips, AUDIO_SAMPLE_RATE)
+
+    results = {}
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        if backend == "onnx":
+            try:
+                import optimum.onnxruntime  # noqa: F401
+            except ImportError:
+                print("skipping onnx: optimum[onnxruntime] is not installed")
+                continue
+        face = inference_backend.load_pipeline("image-classification", face_model, backend)
+        audio = inference_backend.load_pipeline("audio-classification", audio_model, backend)
+        run_images(face, images[:2], args.batch_size)  # warm-up
+        run_audio(audio, clips[:1], AUDIO_SAMPLE_RATE)
+        results[backend] = (run_images(face, images, args.batch_size), run_audio(audio, clips, AUDIO_SAMPLE_RATE))
+
+    (face_ref, face_fps), (audio_ref, audio_rate) = results["torch"]
+    print(f"{len(images)} frames, {len(clips)} audio clips")
+    print(f"{'backend':>8} {'frames/s':>9} {'audio s/s':>10} {'face agree':>11} {'face |d| mean/max':>18} "
+          f"{'audio agree':>12} {'audio |d| mean/max':>19}")
+    print(f"{'torch':>8} {face_fps:>9.1f} {audio_rate:>10.1f} {'-':>11} {'-':>18} {'-':>12} {'-':>19}")
+    for backend, ((face_preds, fps), (audio_preds, rate)) in results.items():
+        if backend == "torch":
+            continue
+        f_agree, f_mean, f_max = parity(face_ref, face_preds)
+        a_agree, a_mean, a_max = parity(audio_ref, audio_preds)
+        print(f"{backend:>8} {fps:>9.1f} {rate:>10.1f} {f_agree:>10.1%} {f_mean:>9.4f}/{f_max:<8.4f} "
+              f"{a_agree:>11.1%} {a_mean:>10.4f}/{a_max:<8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares the old pyplot spectrogram (figure -> PNG on disk -> PIL) with the
+in-memory numpy renderer in audio_analyzer, reported as seconds per minute
+of audio. Run from backend/:
+
+    python benchmarks/bench_spectrogram.py --minutes 1 5 10
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def pyplot_spectrogram(audio_path, output_path):
+    """The previous implementation, kept here only as the baseline."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import librosa
+    import librosa.display
+    from PIL import Image
+
+    y, sr = librosa.load(audio_path, sr=22050)
+    S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=256, fmax=8000)
+    S_dB = librosa.power_to_db(S, ref=np.max)
+    plt.figure(figsize=(10, 4))
+    librosa.display.specshow(S_dB, sr=sr, x_axis='time', y_axis='mel', fmax=8000)
+    plt.axis('off')
+    plt.tight_layout(pad=0)
+    plt.savefig(output_path, bbox_inches='tight', pad_inches=0)
+    plt.close()
+    with Image.open(output_path) as img:
+        img.load()
+    os.remove(output_path)
+
+
+def make_fixture_audio(path, minutes, sr=22050):
+    t = np.arange(int(minutes * 60 * sr)) / sr
+    y = 0.3 * np.sin(2 * np.pi * (220 + 50 * np.sin(t)) * t) + 0.02 * np.random.randn(t.size)
+    sf.write(path, y.astype(np.float32), sr)
+
+
+def best_of(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--width", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=400)
+    args = parser.parse_args()
+
+    from audio_analyzer import create_spectrogram
+
+    with tempfile.TemporaryDirectory(prefix="veritas-bench-") as workdir:
+        print(f"{'minutes':>8} {'pyplot s/min':>13} {'numpy s/min':>12} {'speedup':>8}")
+        for minutes in args.minutes:
+            audio_path = os.path.join(workdir, f"fixture_{minutes}.wav")
+            make_fixture_audio(audio_path, minutes)
+            old = best_of(args.repeats, lambda: pyplot_spectrogram(audio_path, os.path.join(workdir, "old.png")))
+            new = best_of(args.repeats, lambda: create_spectrogram(audio_path, (args.width, args.height)))
+            print(f"{minutes:>8g} {old / minutes:>13.3f} {new / minutes:>12.3f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
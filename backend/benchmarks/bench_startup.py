@@ -0,0 +1,107 @@
+"""
+Server startup cost per ENABLED_MODALITIES configuration. Each run is a fresh interpreter
+that imports app (what gunicorn and `flask init-db` pay before anything else), then imports
+every enabled analyzer (what the first request of each modality pays). Reports the median
+time and the RSS after each step. Model weights are not loaded unless --load-models is given.
+Run from backend/:
+
+    python benchmarks/bench_startup.py --repeat 3 --output startup.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGURATIONS = {
+    "text": "text",
+    "text,image": "text,image",
+    "audio": "audio",
+    "video": "video",
+    "all": "text,image,audio,video",
+}
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def measure(load_models):
+    """Runs inside the child interpreter; prints one JSON line."""
+    sys.path.insert(0, BACKEND_DIR)
+    started = time.perf_counter()
+    import app
+    startup_seconds = time.perf_counter() - started
+    startup_rss = rss_mb()
+    for analyzer in sorted(app.ENABLED_MODALITIES):
+        app.analyzer_module(analyzer)
+    if load_models:
+        app.preload_models(warmup=False)
+    print(json.dumps({
+        "startup_seconds": startup_seconds,
+        "startup_rss_mb": startup_rss,
+        "first_use_seconds": time.perf_counter() - started,
+        "first_use_rss_mb": rss_mb(),
+    }))
+
+
+def run_configuration(modalities, repeat, load_models, workdir):
+    env = {
+        **os.environ,
+        "ENABLED_MODALITIES": modalities,
+        "PRELOAD_MODELS": "0",
+        "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "startup.db"),
+    }
+    command = [sys.executable, os.path.abspath(__file__), "--child"] + (["--load-models"] if load_models else [])
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(command, env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per configuration")
+    parser.add_argument("--load-models", action="store_true", help="also load the model weights (needs network)")
+    parser.add_argument("--configurations", nargs="*", choices=sorted(CONFIGURATIONS), help="default: all of them")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(args.load_models)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="veritas-startup-") as workdir:
+        for name in args.configurations or CONFIGURATIONS:
+            results[name] = run_configuration(CONFIGURATIONS[name], args.repeat, args.load_models, workdir)
+            print(f"  {name}: done", file=sys.stderr)
+
+    print(f"{'modalities':<12} {'startup s':>10} {'startup MB':>11} {'first use s':>12} {'first use MB':>13}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['startup_seconds']:>10.2f} {r['startup_rss_mb']:>11.0f} "
+              f"{r['first_use_seconds']:>12.2f} {r['first_use_rss_mb']:>13.0f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat() + "Z",
+                "python": platform.python_version(),
+                "settings": {"repeat": args.repeat, "load_models": args.load_models},
+                "configurations": results,
+            }, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
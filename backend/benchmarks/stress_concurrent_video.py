@@ -0,0 +1,135 @@
+"""
+Stress test: runs N concurrent /analyze/video-file requests against one process
+and checks that every request succeeds and no scratch directory is left behind.
+It also checks that the first /ready probe answers 503 and starts loading the
+models, that /ready then turns 200, and that it stays 200 while the requests run.
+
+The HF pipelines are replaced with stubs so the run measures our own I/O and
+isolation, not model inference. Run from backend/:
+
+    python benchmarks/stress_concurrent_video.py --concurrency 8 --requests 32
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+class StubPipeline:
+    """Mimics a transformers pipeline: one input -> list of preds, list -> list of lists."""
+
+    def __init__(self, label, delay=0.0):
+        self.label = label
+        self.delay = delay
+
+    def __call__(self, inputs, **kwargs):
+        time.sleep(self.delay)
+        preds = [{"label": self.label, "score": 0.9}, {"label": "other", "score": 0.1}]
+        if isinstance(inputs, list):
+            return [preds for _ in inputs]
+        return preds
+
+
+def make_fixture_video(path, seconds=4, fps=10, size=(160, 120)):
+    from moviepy.editor import VideoClip, AudioClip
+
+    def make_frame(t):
+        frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        frame[:, :, 0] = int(255 * t / seconds)
+        return frame
+
+    def make_audio(t):
+        return np.sin(2 * np.pi * 440 * np.asarray(t)).reshape(-1, 1)
+
+    clip = VideoClip(make_frame, duration=seconds).set_audio(AudioClip(make_audio, duration=seconds, fps=16000))
+    clip.write_videofile(path, fps=fps, codec="libx264", audio_codec="aac", logger=None)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--model-delay", type=float, default=0.05, help="seconds each stub inference call sleeps")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="veritas-stress-")
+    scratch_root = os.path.join(workdir, "scratch")
+    os.environ["SCRATCH_ROOT"] = scratch_root
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "stress.db")
+    os.environ["PRELOAD_MODELS"] = "1"  # so /ready waits for the models
+
+    import app as veritas
+    import video_analyzer  # registers the models the stubs replace
+    from model_registry import registry
+
+    # The stubs are registered as loaders, so /ready has to get them loaded.
+    registry.register("face_detector", lambda: StubPipeline("Real", args.model_delay))
+    registry.register("audio_detector", lambda: StubPipeline("bonafide", args.model_delay))
+    client = veritas.app.test_client()
+    ready_before_load = client.get("/ready").status_code
+    deadline = time.monotonic() + 30
+    while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    with veritas.app.app_context():
+        veritas.db.create_all()
+
+    fixture = make_fixture_video(os.path.join(workdir, "fixture.mp4"))
+    with open(fixture, "rb") as f:
+        payload = f.read()
+
+    def one_request(i):
+        started = time.perf_counter()
+        response = client.post(
+            "/analyze/video-file?no_cache=1",
+            data={"file": (io.BytesIO(payload), "clip.mp4")},
+            content_type="multipart/form-data",
+        )
+        return response.status_code, response.get_json(), time.perf_counter() - started
+
+    probes = []
+    done = threading.Event()
+
+    def probe_ready():
+        while not done.is_set():
+            probes.append(client.get("/ready").status_code)
+            time.sleep(0.05)
+
+    prober = threading.Thread(target=probe_ready)
+    prober.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    prober.join()
+    ready_ok = ready_before_load == 503 and probes and all(status == 200 for status in probes)
+
+    failures = [(status, body) for status, body, _ in results if status != 200 or body.get("decision") != "Real"]
+    leftovers = os.listdir(scratch_root) if os.path.exists(scratch_root) else []
+    latencies = sorted(latency for _, _, latency in results)
+
+    print(f"requests={args.requests} concurrency={args.concurrency} wall={elapsed:.2f}s "
+          f"p50={latencies[len(latencies) // 2]:.2f}s max={latencies[-1]:.2f}s")
+    print(f"failures={len(failures)} leftover_scratch_dirs={len(leftovers)}")
+    print(f"ready_before_load={ready_before_load} ready_probes={len(probes)} "
+          f"ready_probe_failures={sum(status != 200 for status in probes)}")
+    for status, body in failures[:5]:
+        print(f"  {status}: {body}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if failures or leftovers or not ready_ok else 0)
+
+
+if __name__ == "__main__":
+    main()
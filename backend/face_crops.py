@@ -0,0 +1,134 @@
+import os
+import math
+import threading
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+# Side of the square, eye-aligned face crops handed to the deepfake classifier.
+FACE_CROP_SIZE = int(os.getenv("FACE_CROP_SIZE", "224"))
+# Extra context kept around each detected face, as a fraction of its size.
+FACE_CROP_MARGIN = float(os.getenv("FACE_CROP_MARGIN", "0.25"))
+# Frames are shrunk to this width before detection; boxes are scaled back afterwards.
+FACE_DETECT_WIDTH = int(os.getenv("FACE_DETECT_WIDTH", "640"))
+FACE_MIN_SIZE = int(os.getenv("FACE_MIN_SIZE", "40"))
+# A face in the next frame continues a track when the boxes overlap at least this much (IoU).
+FACE_TRACK_IOU = float(os.getenv("FACE_TRACK_IOU", "0.3"))
+# Mean absolute difference (0-255) of a 32x32 grey thumbnail above which a tracked face is reclassified.
+FACE_CHANGE_THRESHOLD = float(os.getenv("FACE_CHANGE_THRESHOLD", "12"))
+FACE_TRACK_MAX_MISSED = int(os.getenv("FACE_TRACK_MAX_MISSED", "2"))
+MAX_ALIGN_ANGLE = 30
+
+# Cascade classifiers are not safe to share between threads, so each thread loads its own.
+_cascades = threading.local()
+
+
+def _get_cascades():
+    if not hasattr(_cascades, "face"):
+        _cascades.face = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        _cascades.eye = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_eye.xml")
+    return _cascades.face, _cascades.eye
+
+
+def detect_faces(frame):
+    """Returns face boxes (x, y, w, h) in frame coordinates, each with the eye-line angle in degrees."""
+    face_cascade, eye_cascade = _get_cascades()
+    height, width = frame.shape[:2]
+    scale = min(1.0, FACE_DETECT_WIDTH / width)
+    small = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA) if scale < 1 else frame
+    gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_RGB2GRAY))
+    min_side = max(1, int(FACE_MIN_SIZE * scale))
+    boxes = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side))
+
+    faces = []
+    for x, y, w, h in boxes:
+        angle = 0.0
+        eyes = eye_cascade.detectMultiScale(gray[y:y + h // 2, x:x + w], scaleFactor=1.1, minNeighbors=5)
+        if len(eyes) >= 2:
+            (ax, ay, aw, ah), (bx, by, bw, bh) = sorted(sorted(eyes, key=lambda e: -e[2] * e[3])[:2], key=lambda e: e[0])
+            angle = math.degrees(math.atan2((by + bh / 2) - (ay + ah / 2), (bx + bw / 2) - (ax + aw / 2)))
+            if abs(angle) > MAX_ALIGN_ANGLE:
+                angle = 0.0
+        faces.append(((x / scale, y / scale, w / scale, h / scale), angle))
+    return faces
+
+
+def align_face(frame, box, angle):
+    """Cuts a square crop around the face, rotated so the eyes are level, in one affine warp."""
+    x, y, w, h = box
+    cx, cy = x + w / 2, y + h / 2
+    side = max(w, h) * (1 + 2 * FACE_CROP_MARGIN)
+    scale = FACE_CROP_SIZE / side
+    matrix = cv2.getRotationMatrix2D((cx, cy), angle, scale)
+    matrix[0, 2] += FACE_CROP_SIZE / 2 - cx
+    matrix[1, 2] += FACE_CROP_SIZE / 2 - cy
+    return cv2.warpAffine(frame, matrix, (FACE_CROP_SIZE, FACE_CROP_SIZE), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def _thumbnail(crop):
+    return cv2.resize(cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY), (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    overlap_w = max(0.0, min(ax + aw, bx + bw) - max(ax, bx))
+    overlap_h = max(0.0, min(ay + ah, by + bh) - max(ay, by))
+    overlap = overlap_w * overlap_h
+    union = aw * ah + bw * bh - overlap
+    return overlap / union if union else 0.0
+
+
+class FaceTrack:
+    def __init__(self, track_id, box, thumb):
+        self.id = track_id
+        self.box = box
+        # Thumbnail of the face as it looked when it was last classified.
+        self.thumb = thumb
+        self.prediction = None
+        self.missed = 0
+
+
+class FaceTracker:
+    """
+    Follows faces from frame to frame by box overlap, so a face that has not visibly
+    changed keeps its previous prediction instead of being classified again.
+    """
+
+    def __init__(self, iou_threshold=FACE_TRACK_IOU, change_threshold=FACE_CHANGE_THRESHOLD,
+                 max_missed=FACE_TRACK_MAX_MISSED):
+        self.iou_threshold = iou_threshold
+        self.change_threshold = change_threshold
+        self.max_missed = max_missed
+        self.tracks = []
+        self._next_id = 0
+
+    def update(self, frame):
+        """Returns (track, crop, changed) for each face in frame; changed faces need classifying."""
+        results = []
+        matched = set()
+        for box, angle in detect_faces(frame):
+            crop = align_face(frame, box, angle)
+            thumb = _thumbnail(crop)
+            candidates = [t for t in self.tracks if t.id not in matched]
+            track = max(candidates, key=lambda t: _iou(t.box, box), default=None)
+            if track is None or _iou(track.box, box) < self.iou_threshold:
+                track = FaceTrack(self._next_id, box, thumb)
+                self._next_id += 1
+                self.tracks.append(track)
+                changed = True
+            else:
+                changed = track.prediction is None or np.abs(thumb - track.thumb).mean() > self.change_threshold
+                track.box = box
+                if changed:
+                    track.thumb = thumb
+            track.missed = 0
+            matched.add(track.id)
+            results.append((track, crop, changed))
+
+        for track in self.tracks:
+            if track.id not in matched:
+                track.missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+        return results
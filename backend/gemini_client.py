@@ -0,0 +1,215 @@
+import os
+import time
+import random
+import hashlib
+import threading
+import google.generativeai as genai
+from PIL import Image
+from dotenv import load_dotenv
+load_dotenv()
+
+import metrics
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    RETRYABLE_ERRORS = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )
+except ImportError:
+    RETRYABLE_ERRORS = ()
+
+# --- CONFIGURATION ---
+# All analyzers share one API key, so they share one quota: the limits below are process-wide.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_RATE_PER_SECOND = float(os.getenv("GEMINI_RATE_PER_SECOND", "2"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "4"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_SECONDS = float(os.getenv("GEMINI_BACKOFF_SECONDS", "1.0"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+
+api_key = os.environ.get("GEMINI_API_KEY")
+if api_key:
+    genai.configure(api_key=api_key)
+else:
+    print("❌ GEMINI_API_KEY environment variable not found or is empty.")
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                raise TimeoutError("Timed out waiting for the Gemini rate limiter.")
+            time.sleep(wait)
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+_semaphore = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+_bucket = TokenBucket(GEMINI_RATE_PER_SECOND, GEMINI_BURST)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "calls": 0,
+    "upstream_calls": 0,
+    "coalesced": 0,
+    "retries": 0,
+    "failures": 0,
+    "latency_seconds_total": 0.0,
+    "latency_seconds_max": 0.0,
+}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _record_latency(seconds):
+    with _stats_lock:
+        _stats["latency_seconds_total"] += seconds
+        _stats["latency_seconds_max"] = max(_stats["latency_seconds_max"], seconds)
+
+
+def stats():
+    """Returns a snapshot of the call, retry and latency counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _collect_metrics():
+    snapshot = stats()
+    return [
+        ("veritas_gemini_calls_total", "counter", "Gemini calls requested by the analyzers.", snapshot["calls"]),
+        ("veritas_gemini_upstream_calls_total", "counter", "Gemini calls sent to the API.", snapshot["upstream_calls"]),
+        ("veritas_gemini_coalesced_total", "counter", "Gemini calls answered by an identical call in flight.",
+         snapshot["coalesced"]),
+        ("veritas_gemini_retries_total", "counter", "Gemini calls retried after a transient error.", snapshot["retries"]),
+        ("veritas_gemini_failures_total", "counter", "Gemini calls that failed for good.", snapshot["failures"]),
+    ]
+
+
+metrics.register_collector(_collect_metrics)
+
+
+def _request_key(model_name, contents):
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for part in contents if isinstance(contents, (list, tuple)) else [contents]:
+        if isinstance(part, Image.Image):
+            digest.update(f"image:{part.mode}:{part.size}".encode("utf-8"))
+            digest.update(part.tobytes())
+        elif isinstance(part, dict) and "data" in part:
+            digest.update(f"blob:{part.get('mime_type')}:".encode("utf-8"))
+            digest.update(part["data"])
+        else:
+            digest.update(f"text:{part}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class GeminiModel:
+    """
+    Drop-in stand-in for genai.GenerativeModel.generate_content that adds the shared
+    concurrency cap, rate limit, retries, timeout and coalescing of identical calls.
+    """
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    @metrics.span("gemini")
+    def generate_content(self, contents):
+        _count("calls")
+        key = _request_key(self.model_name, contents)
+        with _in_flight_lock:
+            call = _in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = _in_flight[key] = _InFlight()
+
+        if not leader:
+            _count("coalesced")
+            call.done.wait()
+        else:
+            try:
+                call.response = self._generate_with_retries(contents)
+            except Exception as e:
+                call.error = e
+            finally:
+                with _in_flight_lock:
+                    del _in_flight[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.response
+
+    def _generate_with_retries(self, contents):
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            try:
+                return self._generate_once(contents)
+            except RETRYABLE_ERRORS as e:
+                if attempt == GEMINI_MAX_RETRIES:
+                    _count("failures")
+                    raise
+                delay = GEMINI_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"Gemini call failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+                _count("retries")
+                time.sleep(delay)
+            except Exception:
+                _count("failures")
+                raise
+
+    def _generate_once(self, contents):
+        if not _semaphore.acquire(timeout=GEMINI_TIMEOUT_SECONDS):
+            raise TimeoutError("Timed out waiting for a free Gemini request slot.")
+        try:
+            _bucket.acquire(GEMINI_TIMEOUT_SECONDS)
+            _count("upstream_calls")
+            started = time.perf_counter()
+            try:
+                return self._model.generate_content(contents, request_options={"timeout": GEMINI_TIMEOUT_SECONDS})
+            finally:
+                _record_latency(time.perf_counter() - started)
+        finally:
+            _semaphore.release()
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_name):
+    """Returns the shared client for model_name, or None if Gemini is not configured."""
+    if not api_key:
+        return None
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = GeminiModel(model_name)
+        return _models[model_name]
@@ -0,0 +1,27 @@
+"""
+Gunicorn settings: gunicorn -c gunicorn.conf.py app:app
+
+The app (and the model weights) are loaded once in the master process and shared
+copy-on-write with the forked workers. Warm-up inference runs in each worker after
+the fork, because torch's thread pools do not survive a fork.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+preload_app = True
+
+
+def on_starting(server):
+    from model_registry import PRELOAD_MODELS
+    if PRELOAD_MODELS:
+        from app import preload_models
+        preload_models(warmup=False)
+
+
+def post_fork(server, worker):
+    from model_registry import registry, PRELOAD_MODELS
+    if PRELOAD_MODELS:
+        registry.warm_up()
@@ -1,39 +1,94 @@
-import google.generativeai as genai
 import json
 import re
+import io
 import os
-from PIL import Image
+from PIL import Image, ImageOps
+
+import gemini_client
+import metrics
+from image_index import PerceptualIndex, phash
+from result_cache import is_cacheable
 
 # --- CONFIGURATION ---
-# ⚠️ This uses the same API key as your audio_analyzer.
-# Ensure it's set correctly for the whole project.
-API_KEY = os.getenv("GEMINI_API_KEY", "YOUR_GEMINI_API_KEY") 
-genai.configure(api_key=API_KEY)
+# The API key, concurrency and rate limits are shared by all analyzers; see gemini_client.py.
+MODEL_NAME = "gemini-1.5-flash"
+# Bump the revision whenever the prompt changes so cached verdicts are not reused.
+ANALYZER_VERSION = f"{MODEL_NAME}:1"
+# Images are downscaled to this longest edge and re-encoded before upload; phone photos
+# are several megabytes at full resolution and the upload dominates the request.
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1536"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "90"))
+# Reuse the verdict of a previously seen image whose perceptual hash is within this many
+# bits (of 64), so resized or re-encoded copies of the same picture skip Gemini.
+IMAGE_INDEX_ENABLED = os.getenv("IMAGE_INDEX_ENABLED", "1").lower() in ("1", "true", "yes")
+IMAGE_MATCH_DISTANCE = int(os.getenv("IMAGE_MATCH_DISTANCE", "6"))
+
+image_index = PerceptualIndex() if IMAGE_INDEX_ENABLED else None
 
 try:
-    # Use the same powerful and fast model
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    print("✅ Gemini image analysis model loaded successfully.")
+    model = gemini_client.get_model(MODEL_NAME)
+    if model is not None:
+        print("✅ Gemini image analysis model loaded successfully.")
 except Exception as e:
     print(f"❌ Error loading Gemini model. Check your API key. Error: {e}")
     model = None
 
+# --- Pre-processing ---
+def _read_source(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    source.seek(0)
+    return source.read()
+
+def prepare_image(img, source):
+    """
+    Returns the image as an upload-ready {mime_type, data} blob and its perceptual hash.
+    source is the path or file object img was opened from.
+    """
+    source_format = img.format
+    if max(img.size) <= IMAGE_MAX_EDGE and source_format in ("JPEG", "WEBP"):
+        # Already compact: send the original bytes rather than compressing them a second time.
+        blob = {"mime_type": Image.MIME[source_format], "data": _read_source(source)}
+        return blob, phash(ImageOps.exif_transpose(img))
+
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((IMAGE_MAX_EDGE, IMAGE_MAX_EDGE), Image.LANCZOS)
+    buffer = io.BytesIO()
+    img.convert("RGB").save(buffer, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    return {"mime_type": "image/jpeg", "data": buffer.getvalue()}, phash(img)
+
 # --- Main Analysis Function ---
-def analyze_image_content(image_path: str):
+def analyze_image_content(image, use_index: bool = True):
     """
-    Analyzes an image file to detect signs of AI generation using the Gemini API.
+    Analyzes an image to detect signs of AI generation using the Gemini API. image is a path,
+    a binary file object (e.g. an upload stream, decoded without touching the disk) or bytes.
+    With use_index=False a near-duplicate verdict is not reused (the new one is still stored).
     """
     if model is None:
         return {"error": "Gemini model is not available. Please check configuration."}
 
     try:
         # Open the image file
-        img = Image.open(image_path)
+        if isinstance(image, (bytes, bytearray)):
+            image = io.BytesIO(image)
+        with metrics.span("image_load"):
+            img = Image.open(image)
+            img.load()
     except FileNotFoundError:
-        return {"error": f"Image file not found at path: {image_path}"}
+        return {"error": f"Image file not found at path: {image}"}
     except Exception as e:
         return {"error": f"Could not open image file: {e}"}
 
+    with metrics.span("image_preprocess"):
+        blob, image_hash = prepare_image(img, image)
+    details = {"phash": f"{image_hash:016x}"}
+    if image_index is not None and use_index:
+        match = image_index.lookup(image_hash, ANALYZER_VERSION, IMAGE_MATCH_DISTANCE)
+        if match is not None:
+            result, distance = match
+            return {**result, "details": {**details, "near_duplicate": True, "distance": distance}}
+
     # The prompt instructs the model on how to behave and what to look for
     prompt = """
     You are a world-class digital image forensics expert. You have been given an image to analyze.
@@ -52,7 +107,7 @@ def analyze_image_content(image_path: str):
 
     try:
         # Send the prompt and the image to the model
-        response = model.generate_content([prompt, img])
+        response = model.generate_content([prompt, blob])
         
         # Clean the response to extract only the JSON part
         json_text_match = re.search(r'\{.*\}', response.text, re.DOTALL)
@@ -62,11 +117,14 @@ def analyze_image_content(image_path: str):
         json_text = json_text_match.group(0)
         data = json.loads(json_text)
         
-        return {
+        result = {
             "decision": data.get("decision", "Uncertain"),
             "confidence": data.get("confidence", 0.0),
             "reason": data.get("reason", "No reason provided.")
         }
+        if image_index is not None and is_cacheable(result):
+            image_index.add(image_hash, ANALYZER_VERSION, result)
+        return {**result, "details": details}
 
     except (json.JSONDecodeError, AttributeError):
         return {"error": "Failed to parse the model's JSON response.", "raw_response": response.text}
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from itertools import combinations
+
+import numpy as np
+from PIL import Image
+
+import metrics
+
+# --- CONFIGURATION ---
+# Kept with the other caches (article, video, ONNX exports) rather than in the source tree.
+IMAGE_INDEX_PATH = os.getenv("IMAGE_INDEX_PATH", os.path.join(tempfile.gettempdir(), "veritas-image-index.db"))
+
+HASH_BITS = 64
+# Multi-index hashing: the hash is split into CHUNKS substrings, each indexed on its own. Two hashes
+# within distance r share at least one substring within distance r // CHUNKS (pigeonhole), so a
+# lookup only has to probe a few exact substring values instead of scanning every stored hash.
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+LOOKUPS = metrics.Counter("veritas_image_index_lookups_total", "Near-duplicate image lookups by outcome.",
+                          ("outcome",))
+
+
+# --- Perceptual Hash ---
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+_DCT = _dct_matrix(32)
+
+def phash(img):
+    """
+    64-bit DCT perceptual hash: the signs of the lowest 8x8 frequencies of a 32x32 grayscale
+    copy, relative to their median. Resizing, re-encoding and mild edits flip only a few bits.
+    """
+    gray = np.asarray(img.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ gray @ _DCT.T)[:8, :8].ravel()
+    bits = low > np.median(low[1:])  # the DC term would dominate the median
+    return int(np.packbits(bits).view(">u8")[0])
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+def _chunks(image_hash):
+    return [(image_hash >> (CHUNK_BITS * j)) & CHUNK_MASK for j in range(CHUNKS)]
+
+def _to_signed(image_hash):
+    """SQLite integers are signed 64-bit."""
+    return image_hash - (1 << HASH_BITS) if image_hash >= 1 << (HASH_BITS - 1) else image_hash
+
+def _neighbors(value, radius):
+    """Every CHUNK_BITS-bit value within `radius` bit flips of value."""
+    values = [value]
+    for flips in range(1, radius + 1):
+        for positions in combinations(range(CHUNK_BITS), flips):
+            flipped = value
+            for position in positions:
+                flipped ^= 1 << position
+            values.append(flipped)
+    return values
+
+
+# --- Verdict Index ---
+class PerceptualIndex:
+    """
+    Previous image verdicts in SQLite, searchable by Hamming distance of their perceptual
+    hash. Each thread keeps its own connection; WAL lets lookups run during inserts.
+    """
+
+    def __init__(self, path=IMAGE_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            chunk_columns = ", ".join(f"c{j} INTEGER NOT NULL" for j in range(CHUNKS))
+            conn.execute(f"""CREATE TABLE IF NOT EXISTS image_hashes (
+                id INTEGER PRIMARY KEY,
+                version TEXT NOT NULL,
+                phash INTEGER NOT NULL,
+                {chunk_columns},
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                UNIQUE (version, phash))""")
+            for j in range(CHUNKS):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_image_hashes_c{j} ON image_hashes (version, c{j})")
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, image_hash, version, max_distance):
+        """Returns (result, distance) for the closest stored verdict within max_distance, or None."""
+        radius = max_distance // CHUNKS
+        # One indexed probe per chunk, so SQLite never has to fall back to a full scan.
+        queries, params = [], []
+        for j, value in enumerate(_chunks(image_hash)):
+            values = _neighbors(value, radius)
+            queries.append(f"SELECT phash, result FROM image_hashes WHERE version = ? "
+                           f"AND c{j} IN ({', '.join('?' * len(values))})")
+            params += [version, *values]
+        with metrics.span("image_index_lookup"):
+            rows = self._connection().execute(" UNION ".join(queries), params).fetchall()
+
+        best = None
+        for stored_hash, result in rows:
+            distance = hamming(image_hash, stored_hash & ((1 << HASH_BITS) - 1))
+            if distance <= max_distance and (best is None or distance < best[1]):
+                best = (result, distance)
+        LOOKUPS.inc(outcome="hit" if best else "miss")
+        if best is None:
+            return None
+        return json.loads(best[0]), best[1]
+
+    def add(self, image_hash, version, result):
+        self.add_many([(image_hash, version, result)])
+
+    def add_many(self, entries):
+        """Stores (hash, version, result) verdicts; a newer verdict for the same hash replaces the old one."""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO image_hashes (version, phash, {', '.join(f'c{j}' for j in range(CHUNKS))}, "
+                f"result, created_at) VALUES ({', '.join('?' * (CHUNKS + 4))})",
+                [(version, _to_signed(image_hash), *_chunks(image_hash), json.dumps(result), now)
+                 for image_hash, version, result in entries])
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import torch
+from transformers import pipeline
+
+# --- CONFIGURATION ---
+# "torch" runs the fp32 pipelines as published, "int8" quantizes their Linear layers
+# dynamically, "onnx" exports them to ONNX Runtime (needs `pip install optimum[onnxruntime]`).
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+# Exported ONNX models are kept here so the export only happens once per model.
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.join(tempfile.gettempdir(), "veritas-onnx"))
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))
+BACKENDS = ("torch", "int8", "onnx")
+
+if INFERENCE_THREADS > 0:
+    torch.set_num_threads(INFERENCE_THREADS)
+
+
+def quantize_pipeline(pipe):
+    """Swaps the pipeline's model for a dynamically quantized int8 copy (Linear layers only)."""
+    pipe.model = torch.quantization.quantize_dynamic(pipe.model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+    return pipe
+
+
+def onnx_pipeline(task, model_id, cache_dir=ONNX_CACHE_DIR):
+    """Builds the same pipeline on ONNX Runtime, exporting the model on first use."""
+    from optimum.onnxruntime import ORTModelForAudioClassification, ORTModelForImageClassification
+    from transformers import AutoFeatureExtractor, AutoImageProcessor
+
+    model_class = ORTModelForImageClassification if task == "image-classification" else ORTModelForAudioClassification
+    export_dir = os.path.join(cache_dir, model_id.replace("/", "--"))
+    if os.path.exists(os.path.join(export_dir, "model.onnx")):
+        model = model_class.from_pretrained(export_dir)
+    else:
+        print(f"Exporting {model_id} to ONNX...")
+        model = model_class.from_pretrained(model_id, export=True)
+        model.save_pretrained(export_dir)
+
+    if task == "image-classification":
+        return pipeline(task, model=model, image_processor=AutoImageProcessor.from_pretrained(model_id))
+    return pipeline(task, model=model, feature_extractor=AutoFeatureExtractor.from_pretrained(model_id))
+
+
+def load_pipeline(task, model_id, backend=INFERENCE_BACKEND):
+    """Returns a transformers pipeline for model_id running on the requested backend."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{backend}'; expected one of {', '.join(BACKENDS)}.")
+    if backend == "onnx":
+        # No silent fallback: the analyzer version (and so every cached verdict) names the backend.
+        try:
+            return onnx_pipeline(task, model_id)
+        except ImportError as e:
+            raise ImportError(f"INFERENCE_BACKEND=onnx needs `pip install optimum[onnxruntime]` ({e}).") from e
+    pipe = pipeline(task, model=model_id)
+    if backend == "int8":
+        pipe = quantize_pipeline(pipe)
+    return pipe
@@ -0,0 +1,57 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONFIGURATION ---
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Jobs allowed to wait for a free worker before submissions are rejected.
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "8"))
+
+class QueueFull(Exception):
+    """Raised when every worker is busy and the waiting queue is at capacity."""
+
+
+class JobRunner:
+    """A bounded worker pool: at most max_workers running plus max_queue waiting."""
+
+    def __init__(self, max_workers=JOB_WORKERS, max_queue=JOB_QUEUE_SIZE):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="veritas-job")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull("The analysis queue is full. Please retry shortly.")
+        try:
+            return self._executor.submit(self._run, fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _run(self, fn, *args):
+        try:
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+
+def current_worker_id():
+    """Identifies the process running a job, so a restarted worker can spot orphans."""
+    # Read on every call: with preload_app this module is imported in the gunicorn master.
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def worker_is_gone(worker_id):
+    """True if worker_id names a process on this host that no longer exists."""
+    host, _, pid = (worker_id or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
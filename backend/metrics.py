@@ -0,0 +1,182 @@
+"""
+In-process metrics in the Prometheus text format, without extra dependencies.
+
+Stages are timed with `span("name")`, as a context manager or a decorator. Every span
+feeds the veritas_stage_duration_seconds histogram and, while a breakdown is being
+collected (one per request or job), adds its time to that breakdown as well.
+Each gunicorn worker keeps its own numbers, so a scrape reflects a single worker.
+"""
+import json
+import math
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, math.inf)
+
+_metrics = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(f"{self.name}{_format_labels(zip(self.labelnames, key))}", value)
+                    for key, value in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        lines = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                pairs = list(zip(self.labelnames, key))
+                for bound, count in zip(self.buckets, counts):
+                    lines.append((f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])}", count))
+                lines.append((f"{self.name}_sum{_format_labels(pairs)}", total))
+                lines.append((f"{self.name}_count{_format_labels(pairs)}", counts[-1]))
+        return lines
+
+
+def register_collector(collect):
+    """collect() returns (name, kind, help, value) tuples computed at scrape time."""
+    _collectors.append(collect)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(f"{name} {_format_value(value)}" for name, value in metric.samples())
+    for collect in _collectors:
+        for name, kind, help_text, value in collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# --- METRICS ---
+REQUEST_SECONDS = Histogram("veritas_request_duration_seconds", "HTTP request latency.",
+                            ("endpoint", "method", "status"))
+REQUESTS_IN_FLIGHT = Gauge("veritas_requests_in_flight", "HTTP requests being served.", ("endpoint",))
+ERRORS = Counter("veritas_errors_total", "Requests that failed with a 5xx status.", ("endpoint",))
+STAGE_SECONDS = Histogram("veritas_stage_duration_seconds", "Time spent in each analysis stage.", ("stage",))
+CACHE_LOOKUPS = Counter("veritas_result_cache_lookups_total", "Result cache lookups by outcome.",
+                        ("analyzer", "outcome"))
+
+# --- SPANS & BREAKDOWNS ---
+_breakdown = contextvars.ContextVar("veritas_breakdown", default=None)
+_breakdown_lock = threading.Lock()
+
+
+@contextmanager
+def span(stage):
+    """Times a stage; usable as `with span("x"):` or as the decorator `@span("x")`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            with _breakdown_lock:
+                breakdown[stage] = breakdown.get(stage, 0.0) + elapsed
+
+
+def start_breakdown():
+    """Starts collecting span times for the current request or job; returns a token for end_breakdown."""
+    return _breakdown.set({})
+
+
+def end_breakdown(token):
+    _breakdown.reset(token)
+
+
+def current_breakdown():
+    """Seconds per stage collected so far (stages that ran in parallel overlap), or None."""
+    breakdown = _breakdown.get()
+    if breakdown is None:
+        return None
+    with _breakdown_lock:
+        return {stage: round(seconds, 4) for stage, seconds in breakdown.items()}
+
+
+def breakdown_json():
+    breakdown = current_breakdown()
+    return json.dumps(breakdown) if breakdown else None
+
+
+def propagate(fn):
+    """Binds fn to a copy of the caller's context, so spans in a worker thread join its breakdown."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
@@ -0,0 +1,112 @@
+import os
+import time
+import threading
+
+import metrics
+
+# --- CONFIGURATION ---
+# Load (and warm up) every registered model when the server starts instead of in the first request.
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1").lower() in ("1", "true", "yes")
+# A model that failed to load is tried again on the next get() after this many seconds.
+MODEL_RETRY_SECONDS = float(os.getenv("MODEL_RETRY_SECONDS", "60"))
+
+
+class _Entry:
+    def __init__(self, name, loader, warmup):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.model = None
+        self.error = None
+        self.failed_at = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Owns the ML models. Analyzers register a loader (and optionally a warm-up call) at
+    import time and fetch models with get(); nothing is loaded until get() or preload().
+    """
+
+    def __init__(self, retry_seconds=MODEL_RETRY_SECONDS):
+        self._entries = {}
+        self.retry_seconds = retry_seconds
+
+    def register(self, name, loader, warmup=None):
+        self._entries[name] = _Entry(name, loader, warmup)
+
+    def get(self, name):
+        """Returns the loaded model, loading it on first use, or None if loading failed."""
+        entry = self._entries[name]
+        if entry.model is None and self._should_load(entry):
+            self._load(entry)
+        return entry.model
+
+    def _should_load(self, entry):
+        # After a failure, back off instead of reloading the weights on every request.
+        return entry.error is None or time.monotonic() - entry.failed_at >= self.retry_seconds
+
+    def set(self, name, model):
+        """Replaces a model outright (used by benchmarks to plug in stubs)."""
+        entry = self._entries[name]
+        with entry.lock:
+            entry.model, entry.error = model, None
+
+    def _load(self, entry):
+        # One lock per model, so concurrent first requests load the weights only once.
+        with entry.lock:
+            if entry.model is not None or not self._should_load(entry):
+                return
+            print(f"Loading model '{entry.name}'...")
+            started = time.perf_counter()
+            try:
+                with metrics.span("model_load"):
+                    entry.model = entry.loader()
+                entry.error = None
+                entry.load_seconds = time.perf_counter() - started
+                print(f"Model '{entry.name}' loaded in {entry.load_seconds:.1f}s.")
+            except Exception as e:
+                print(f"Error loading model '{entry.name}': {e}")
+                entry.error = str(e)
+                entry.failed_at = time.monotonic()
+
+    def preload(self, warmup=True):
+        """Loads every registered model; warm-up runs one dummy inference per model."""
+        for entry in self._entries.values():
+            self.get(entry.name)
+        if warmup:
+            self.warm_up()
+
+    def warm_up(self):
+        for entry in self._entries.values():
+            if entry.model is None or entry.warmup is None:
+                continue
+            started = time.perf_counter()
+            try:
+                with metrics.span("model_warmup"):
+                    entry.warmup(entry.model)
+                entry.warmup_seconds = time.perf_counter() - started
+            except Exception as e:
+                print(f"Warm-up of model '{entry.name}' failed: {e}")
+
+    def status(self):
+        """
+        Per-model load state and timings, plus whether the server is ready: every model
+        loaded when PRELOAD_MODELS is on, always when models load on first use instead.
+        """
+        models = {
+            entry.name: {
+                "loaded": entry.model is not None,
+                "error": entry.error,
+                "load_seconds": entry.load_seconds,
+                "warmup_seconds": entry.warmup_seconds,
+            }
+            for entry in self._entries.values()
+        }
+        ready = all(m["loaded"] for m in models.values()) if PRELOAD_MODELS else True
+        return {"ready": ready, "preload": PRELOAD_MODELS, "models": models}
+
+
+registry = ModelRegistry()
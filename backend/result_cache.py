@@ -0,0 +1,128 @@
+import os
+import re
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# --- CONFIGURATION ---
+CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+# Expired entries are deleted from the persistent store at most this often.
+CACHE_PURGE_SECONDS = int(os.getenv("RESULT_CACHE_PURGE_SECONDS", str(60 * 60)))
+
+# Query parameters that never change what a URL points to.
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "si", "feature", "ref", "ref_src"}
+YOUTUBE_ID_PATTERN = re.compile(
+    r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([A-Za-z0-9_-]{11})"
+)
+
+# --- Cache Keys ---
+def normalize_text(text):
+    """Collapses whitespace so trivially different submissions share a key."""
+    return " ".join(text.split())
+
+def canonicalize_url(url):
+    """Reduces a URL to a canonical form: lowercase host, no fragment, no tracking params."""
+    url = url.strip()
+    youtube_match = YOUTUBE_ID_PATTERN.search(url)
+    if youtube_match:
+        return f"https://www.youtube.com/watch?v={youtube_match.group(1)}"
+
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), host, path, urlencode(query), ""))
+
+def hash_stream(stream, chunk_size=1024 * 1024):
+    """Returns the SHA-256 of a whole file-like object, wherever it was positioned, and rewinds it."""
+    # The same upload can be read more than once (e.g. batch items sharing a form field).
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def make_cache_key(analyzer, version, material):
+    """Builds the cache key from the analyzer, its model version and the content identity."""
+    return hashlib.sha256(f"{analyzer}\x00{version}\x00{material}".encode("utf-8")).hexdigest()
+
+def is_cacheable(result):
+    """Only successful verdicts are cached; errors should be retried on the next request."""
+    if not isinstance(result, dict) or "error" in result:
+        return False
+    return str(result.get("decision", "")).lower() not in ("", "error", "uncertain")
+
+# --- Two-Tier Cache ---
+class ResultCache:
+    """
+    A bounded in-process LRU in front of an optional persistent store.
+    The store needs get(key) -> (result, created_at) | None and put(key, result, created_at);
+    if it also has purge(before), expired entries are deleted every purge_seconds.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS, store=None,
+                 purge_seconds=CACHE_PURGE_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.purge_seconds = purge_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    return json.loads(result)
+                del self._entries[key]
+
+        if self.store is None:
+            return None
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        result, created_at = entry
+        if now - created_at > self.ttl_seconds:
+            return None
+        self._remember(key, json.dumps(result), created_at)
+        return result
+
+    def put(self, key, result):
+        created_at = time.time()
+        self._remember(key, json.dumps(result), created_at)
+        if self.store is not None:
+            self.store.put(key, result, created_at)
+            self._maybe_purge(created_at)
+
+    def _maybe_purge(self, now):
+        purge = getattr(self.store, "purge", None)
+        with self._lock:
+            if purge is None or now - self._last_purge < self.purge_seconds:
+                return
+            self._last_purge = now
+        purge(now - self.ttl_seconds)
+
+    def _remember(self, key, payload, created_at):
+        # Results are kept serialized so callers can never mutate a cached entry.
+        with self._lock:
+            self._entries[key] = (payload, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
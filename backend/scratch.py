@@ -0,0 +1,30 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+# Parent directory for per-request scratch space; defaults to the system temp dir.
+SCRATCH_ROOT = os.getenv("SCRATCH_ROOT") or None
+
+
+def new_scratch_dir():
+    """Creates a private directory for one analysis. The caller must remove it."""
+    if SCRATCH_ROOT:
+        os.makedirs(SCRATCH_ROOT, exist_ok=True)
+    return tempfile.mkdtemp(prefix="veritas-", dir=SCRATCH_ROOT)
+
+
+def remove_scratch_dir(path):
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextmanager
+def scratch_dir():
+    """Yields a private scratch directory that is always removed afterwards."""
+    path = new_scratch_dir()
+    try:
+        yield path
+    finally:
+        remove_scratch_dir(path)
@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# app reads its configuration at import time, so point it at throwaway state first.
+_workdir = tempfile.mkdtemp(prefix="veritas-tests-")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(_workdir, "tests.db"))
+os.environ.setdefault("SCRATCH_ROOT", os.path.join(_workdir, "scratch"))
+os.environ.setdefault("IMAGE_INDEX_PATH", os.path.join(_workdir, "image_index.db"))
+os.environ.setdefault("PRELOAD_MODELS", "0")
+os.environ.setdefault("WRITE_BEHIND", "0")
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    """stub_model(name, model) swaps a registry entry for this test only."""
+    import video_analyzer  # noqa: F401  registers the video models
+    from model_registry import registry, _Entry
+
+    def install(name, model):
+        entry = _Entry(name, lambda: model, None)
+        entry.model = model
+        monkeypatch.setitem(registry._entries, name, entry)
+    return install
@@ -0,0 +1,17 @@
+import app as veritas
+
+
+def test_failed_analysis_returns_its_error_and_is_not_recorded(monkeypatch):
+    monkeypatch.setattr(veritas, "analyze_text_content",
+                        lambda content: {"error": "Gemini model is not available. Please check configuration."})
+    with veritas.app.app_context():
+        veritas.db.create_all()
+        before = veritas.Analysis.query.count()
+    client = veritas.app.test_client()
+
+    response = client.post("/analyze/text?no_cache=1", json={"text": "some words"})
+
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "Gemini model is not available. Please check configuration."}
+    with veritas.app.app_context():
+        assert veritas.Analysis.query.count() == before
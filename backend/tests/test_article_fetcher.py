@@ -0,0 +1,90 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from article_fetcher import ArticleFetcher, ResponseTooLarge
+
+ARTICLE = b"<html><body><p>First paragraph.</p><div>menu</div><p>Second one.</p></body></html>"
+ETAG = '"v1"'
+
+
+class ArticleHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path.startswith("/big"):
+            # No Content-Length on /big-streamed, so only the streamed byte count can catch it.
+            body = b"<p>" + b"x" * 200_000 + b"</p>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            if self.path == "/big":
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(ARTICLE)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(ARTICLE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ArticleHandler)
+    ArticleHandler.requests_seen = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", ArticleHandler.requests_seen
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fresh_cache_hit_skips_the_network(server, tmp_path):
+    base, seen = server
+    fetcher = ArticleFetcher(cache_dir=str(tmp_path), fresh_seconds=600)
+
+    assert fetcher.fetch_text(base + "/article") == "First paragraph. Second one."
+    assert fetcher.fetch_text(base + "/article") == "First paragraph. Second one."
+    assert seen == [("/article", None)]
+
+
+def test_stale_cache_is_revalidated_with_the_etag(server, tmp_path):
+    base, seen = server
+    fetcher = ArticleFetcher(cache_dir=str(tmp_path), fresh_seconds=0)
+
+    assert fetcher.fetch_text(base + "/article") == "First paragraph. Second one."
+    assert fetcher.fetch_text(base + "/article") == "First paragraph. Second one."
+    assert seen == [("/article", None), ("/article", ETAG)]
+
+
+@pytest.mark.parametrize("path", ["/big", "/big-streamed"])
+def test_pages_over_the_size_cap_are_rejected(server, tmp_path, path):
+    base, _ = server
+    fetcher = ArticleFetcher(cache_dir=str(tmp_path), max_bytes=100_000)
+
+    with pytest.raises(ResponseTooLarge):
+        fetcher.fetch_text(base + path)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".json")]
+
+
+def test_cache_evicts_least_recently_used_articles(server, tmp_path):
+    base, _ = server
+    fetcher = ArticleFetcher(cache_dir=str(tmp_path), fresh_seconds=600, cache_max_bytes=1)
+    fetcher.fetch_text(base + "/article?a")
+    fetcher.fetch_text(base + "/article?b")
+
+    cached = [name for name in os.listdir(tmp_path) if name.endswith(".json")]
+    assert cached == [os.path.basename(fetcher._cache_path(base + "/article?b"))]
@@ -0,0 +1,44 @@
+import io
+import json
+
+import pytest
+
+import app as veritas
+
+
+@pytest.fixture
+def client(monkeypatch):
+    seen = []
+
+    def fake_image_analysis(filepath, use_index=True):
+        with open(filepath, "rb") as f:
+            data = f.read()
+        seen.append(data)
+        return {"decision": "Fake" if data.startswith(b"red") else "Real", "confidence": 0.9, "reason": data.decode()}
+
+    monkeypatch.setattr(veritas, "analyze_image_content", fake_image_analysis)
+    with veritas.app.app_context():
+        veritas.db.create_all()
+    client = veritas.app.test_client()
+    client.seen = seen
+    return client
+
+
+def post_batch(client, field_data):
+    items = [{"type": "image", "file": "img"}, {"type": "image", "file": "img"}]
+    response = client.post("/analyze/batch", data={
+        "items": json.dumps(items), "img": (io.BytesIO(field_data), "photo.jpg"),
+    }, content_type="multipart/form-data")
+    assert response.status_code == 200
+    return response.get_json()["results"]
+
+
+def test_items_sharing_a_form_field_are_keyed_by_its_content(client):
+    red = post_batch(client, b"red pixels")
+    blue = post_batch(client, b"blue pixels")
+
+    assert [item["decision"] for item in red] == ["Fake", "Fake"]
+    assert [item["decision"] for item in blue] == ["Real", "Real"]
+    assert all(item["reason"] == "blue pixels" for item in blue)
+    # Every item was analyzed from the full upload, never from an exhausted stream.
+    assert b"" not in client.seen
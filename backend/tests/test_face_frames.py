@@ -0,0 +1,39 @@
+import numpy as np
+
+import video_analyzer
+from face_crops import FaceTrack
+
+
+class StaticFaceTracker:
+    """One face that never changes, so only the first frame needs classifying."""
+
+    def __init__(self):
+        self.track = FaceTrack(0, (0, 0, 8, 8), None)
+
+    def update(self, frame):
+        changed = self.track.prediction is None
+        return [(self.track, frame, changed)]
+
+
+def test_reused_predictions_are_not_counted_as_samples(monkeypatch, stub_model):
+    calls = []
+
+    def face_detector(images, batch_size):
+        calls.append(len(images))
+        return [[{"label": "Fake", "score": 0.9}, {"label": "Real", "score": 0.1}] for _ in images]
+
+    monkeypatch.setattr(video_analyzer, "FaceTracker", StaticFaceTracker)
+    stub_model("face_detector", face_detector)
+    events = []
+    frames = (np.zeros((8, 8, 3), dtype=np.uint8) for _ in range(40))
+
+    label, score, _, frame_scores = video_analyzer.check_face_frames(
+        frames, batch_size=4, min_frames=2, max_frames=3, crop_faces=True,
+        on_batch=lambda fresh, new: events.append((len(fresh), len(new))))
+
+    assert (label, score) == ("Fake", 0.9)
+    assert calls == [1]
+    # Every frame is recorded, but the 39 repeats neither settle the verdict nor hit max_frames.
+    assert len(frame_scores) == 40
+    assert sum(not f["reused"] for f in frame_scores) == 1
+    assert events == [(1, 1)]
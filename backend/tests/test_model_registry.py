@@ -0,0 +1,50 @@
+import model_registry
+from model_registry import ModelRegistry
+
+
+def test_failed_load_is_retried_after_backoff():
+    attempts = []
+
+    def loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("weights not reachable")
+        return "model"
+
+    registry = ModelRegistry(retry_seconds=3600)
+    registry.register("flaky", loader)
+    assert registry.get("flaky") is None
+    assert registry.get("flaky") is None
+    assert len(attempts) == 1
+
+    registry.retry_seconds = 0
+    assert registry.get("flaky") == "model"
+    assert registry.status()["models"]["flaky"]["error"] is None
+    assert len(attempts) == 2
+
+
+def test_ready_without_preload_before_models_load(monkeypatch):
+    registry = ModelRegistry()
+    registry.register("lazy", lambda: "model")
+    monkeypatch.setattr(model_registry, "PRELOAD_MODELS", True)
+    assert registry.status()["ready"] is False
+    monkeypatch.setattr(model_registry, "PRELOAD_MODELS", False)
+    assert registry.status()["ready"] is True
+
+
+def test_ready_probe_starts_the_preload(monkeypatch):
+    import time
+
+    import app as veritas
+    from model_registry import registry, _Entry
+
+    for name in ("face_detector", "audio_detector"):
+        monkeypatch.setitem(registry._entries, name, _Entry(name, lambda: "stub", None))
+    monkeypatch.setattr(model_registry, "PRELOAD_MODELS", True)
+    client = veritas.app.test_client()
+
+    assert client.get("/ready").status_code == 503
+    deadline = time.monotonic() + 10
+    while client.get("/ready").status_code != 200:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
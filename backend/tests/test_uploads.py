@@ -0,0 +1,22 @@
+import io
+
+import pytest
+
+import app as veritas
+
+
+def test_small_upload_limit_is_reported_in_bytes(monkeypatch):
+    monkeypatch.setitem(veritas.UPLOAD_LIMITS, "handle_image_analysis", 1000)
+    client = veritas.app.test_client()
+
+    response = client.post("/analyze/image", data={"file": (io.BytesIO(b"x" * 2000), "photo.jpg")},
+                           content_type="multipart/form-data")
+
+    assert response.status_code == 413
+    assert response.get_json() == {"error": "The upload is larger than the 1000 bytes limit", "limit_bytes": 1000}
+
+
+@pytest.mark.parametrize("size, shown", [(512 * 1024, "512 KB"), (1536 * 1024, "1.5 MB"), (32 * 1024 ** 2, "32 MB"),
+                                         (2 * 1024 ** 3, "2 GB")])
+def test_format_size(size, shown):
+    assert veritas.format_size(size) == shown
@@ -0,0 +1,115 @@
+import errno
+import os
+import threading
+
+import pytest
+
+import video_cache
+from video_cache import LOOKUPS, VideoDownloader
+
+
+class FakeDownloader(VideoDownloader):
+    def _download(self, url, sections, staging):
+        path = os.path.join(staging, "video.mp4")
+        with open(path, "wb") as f:
+            f.write(url.encode() * 1024)
+        return path
+
+
+def test_eviction_does_not_break_concurrent_cache_hits(tmp_path):
+    # Room for one video, so every download evicts the video other threads are reading.
+    downloader = FakeDownloader(cache_dir=str(tmp_path / "cache"), max_bytes=12 * 1024)
+    urls = [f"https://example.com/v{i}" for i in range(4)]
+    errors = []
+
+    def worker(n):
+        for i in range(50):
+            url = urls[(n + i) % len(urls)]
+            workdir = tmp_path / f"w{n}-{i}"
+            workdir.mkdir()
+            try:
+                path = downloader.fetch(url, str(workdir))
+                with open(path, "rb") as f:
+                    assert f.read(len(url)) == url.encode()
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def lookups():
+    return {outcome: LOOKUPS._values.get((outcome,), 0) for outcome in ("hit", "miss")}
+
+
+@pytest.fixture
+def local_video(tmp_path):
+    """A file:// URL standing in for a remote video, and a fresh workdir per fetch."""
+    source = tmp_path / "clip.mp4"
+    source.write_bytes(os.urandom(50_000))
+    workdirs = iter(range(1000))
+
+    def workdir():
+        path = tmp_path / f"work{next(workdirs)}"
+        path.mkdir()
+        return str(path)
+    return source, source.as_uri(), workdir
+
+
+def test_file_url_is_downloaded_once_then_served_from_the_cache(tmp_path, local_video):
+    source, url, workdir = local_video
+    downloader = VideoDownloader(cache_dir=str(tmp_path / "cache"), allow_file_urls=True)
+    content = source.read_bytes()
+    before = lookups()
+
+    first = downloader.fetch(url, workdir())
+    source.unlink()  # the "remote" is gone; the second fetch must not need it
+    second = downloader.fetch(url, workdir())
+
+    assert open(first, "rb").read() == content
+    assert open(second, "rb").read() == content
+    after = lookups()
+    assert (after["miss"] - before["miss"], after["hit"] - before["hit"]) == (1, 1)
+
+
+def test_cached_video_is_copied_when_hard_links_fail(tmp_path, local_video, monkeypatch):
+    source, url, workdir = local_video
+    downloader = VideoDownloader(cache_dir=str(tmp_path / "cache"), allow_file_urls=True)
+
+    def no_links(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(video_cache.os, "link", no_links)
+
+    paths = [downloader.fetch(url, workdir()) for _ in range(2)]
+
+    cached = [entry.path for entry in os.scandir(tmp_path / "cache") if entry.name.endswith(".mp4")]
+    assert len(cached) == 1
+    for path in paths:
+        assert open(path, "rb").read() == source.read_bytes()
+        assert os.stat(path).st_nlink == 1  # a copy, not a link to the cached file
+
+
+def test_least_recently_used_video_is_evicted(tmp_path, local_video):
+    source, url, workdir = local_video
+    other = tmp_path / "other.mp4"
+    other.write_bytes(os.urandom(50_000))
+    downloader = VideoDownloader(cache_dir=str(tmp_path / "cache"), max_bytes=60_000, allow_file_urls=True)
+    before = lookups()
+
+    downloader.fetch(url, workdir())
+    downloader.fetch(other.as_uri(), workdir())  # evicts the first video
+    downloader.fetch(url, workdir())
+
+    after = lookups()
+    assert (after["miss"] - before["miss"], after["hit"] - before["hit"]) == (3, 0)
+
+
+def test_file_urls_are_refused_unless_enabled(tmp_path, local_video):
+    _, url, workdir = local_video
+    downloader = VideoDownloader(cache_dir=str(tmp_path / "cache"))
+    with pytest.raises(ValueError):
+        downloader.fetch(url, workdir())
@@ -0,0 +1,40 @@
+import pytest
+
+from result_cache import is_cacheable
+from video_analyzer import combine_video_verdict
+
+FACE_REAL = ("Real", 0.9, "Faces look authentic.", [])
+AUDIO_REAL = ("bonafide", 0.8, "Voice looks authentic.", [])
+FACE_ERROR = ("error", 0.0, "Face detection model is not available.", [])
+AUDIO_ERROR = ("error", 0.0, "Audio detection model is not available.", [])
+
+
+@pytest.mark.parametrize("face, audio, error", [
+    (FACE_ERROR, AUDIO_REAL, "Face detection model is not available."),
+    (FACE_REAL, AUDIO_ERROR, "Audio detection model is not available."),
+    (FACE_ERROR, AUDIO_ERROR, "Face detection model is not available. Audio detection model is not available."),
+])
+def test_a_failed_branch_is_an_error_not_a_fake_verdict(face, audio, error):
+    result = combine_video_verdict(face, audio)
+
+    assert result == {"error": error}
+    assert not is_cacheable(result)
+
+
+def test_authentic_branches_are_real():
+    result = combine_video_verdict(FACE_REAL, AUDIO_REAL)
+
+    assert result["decision"] == "Real"
+    assert result["overall_confidence"] == pytest.approx(0.85)
+
+
+def test_url_analysis_checks_the_models_before_downloading(monkeypatch, stub_model):
+    import video_analyzer
+
+    downloads = []
+    monkeypatch.setattr(video_analyzer, "download_youtube_video", lambda *args: downloads.append(args))
+    stub_model("face_detector", None)  # failed to load
+
+    with pytest.raises(RuntimeError, match="not available"):
+        video_analyzer.analyze_video_from_url("https://example.com/watch?v=1")
+    assert downloads == []
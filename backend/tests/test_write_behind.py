@@ -0,0 +1,25 @@
+import os
+
+from write_behind import WriteBehindRecorder
+
+
+def test_rows_recorded_in_a_forked_worker_are_written(tmp_path):
+    out = tmp_path / "rows.txt"
+
+    def flush(rows):
+        with open(out, "a") as f:
+            f.writelines(f"{os.getpid()} {row}\n" for row in rows)
+
+    # Created before the fork, like the module-level recorder under gunicorn's preload_app.
+    recorder = WriteBehindRecorder(flush, flush_seconds=0.01)
+    assert recorder._thread is None
+
+    pid = os.fork()
+    if pid == 0:
+        recorder.record("from-worker")
+        recorder.close()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert out.read_text() == f"{pid} from-worker\n"
+    recorder.close()
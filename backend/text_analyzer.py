@@ -1,21 +1,19 @@
-
-import os
-import requests
-from bs4 import BeautifulSoup
-import google.generativeai as genai
 import json
-from dotenv import load_dotenv
-load_dotenv()
 
-try:
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY environment variable not found or is empty.")
-    
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    print("✅ Gemini text analysis model loaded successfully.")
+import gemini_client
+import metrics
+from article_fetcher import fetch_article_text
 
+# --- CONFIGURATION ---
+# The API key, concurrency and rate limits are shared by all analyzers; see gemini_client.py.
+MODEL_NAME = "gemini-1.5-flash"
+# Bump the revision whenever the prompt changes so cached verdicts are not reused.
+ANALYZER_VERSION = f"{MODEL_NAME}:1"
+
+try:
+    model = gemini_client.get_model(MODEL_NAME)
+    if model is not None:
+        print("✅ Gemini text analysis model loaded successfully.")
 except Exception as e:
     print(f"❌ Error initializing Gemini: {e}")
     model = None
@@ -33,10 +31,8 @@ def analyze_text_content(content: str):
 
     if is_url:
         try:
-            resp = requests.get(content, timeout=10)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
-            text_to_analyze = " ".join([p.get_text() for p in soup.find_all("p")])
+            with metrics.span("article_fetch"):
+                text_to_analyze = fetch_article_text(content)
             if not text_to_analyze.strip():
                 return {"decision": "Error", "confidence": 0.0, "reason": "No extractable text found at URL."}
         except Exception as e:
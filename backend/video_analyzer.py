@@ -1,116 +1,410 @@
 import os
 import cv2
-import shutil
-import json
+import math
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import librosa
+import soundfile as sf
+from contextlib import contextmanager
 from moviepy.editor import VideoFileClip
-from transformers import pipeline
-import yt_dlp
-
-# --- LAZY LOADING IMPLEMENTATION ---
-# Initialize models as None. They will be loaded on first use.
-face_detector = None
-audio_detector = None
-models_loaded = False
-
-def load_models():
-    """Loads the ML models only when needed."""
-    global face_detector, audio_detector, models_loaded
-    if not models_loaded:
-        try:
-            print("Loading video analysis models for the first time...")
-            face_detector = pipeline("image-classification", model="prithivMLmods/Deep-Fake-Detector-v2-Model")
-            audio_detector = pipeline("audio-classification", model="MelodyMachine/Deepfake-audio-detection-V2")
-            models_loaded = True
-            print("Video analysis models loaded successfully.")
-        except Exception as e:
-            print(f"Error loading video models: {e}")
-            # Ensure they remain None if loading fails
-            face_detector = None
-            audio_detector = None
-    # If already loaded, this function does nothing.
-
-def download_youtube_video(url, output_path="downloaded_video.mp4"):
-    if "shorts/" in url:
-        video_id = url.split("shorts/")[1].split("?")[0]
-        url = f"https://www.youtube.com/watch?v={video_id}"
-    ydl_opts = {'format': 'mp4', 'outtmpl': output_path, 'quiet': True}
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([url])
-    return output_path
-
-def extract_frames(video_path, output_folder="temp_frames", fps=1):
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    with VideoFileClip(video_path) as clip:
-        for i, frame in enumerate(clip.iter_frames(fps=fps)):
-            frame_path = f"{output_folder}/frame_{i}.jpg"
-            cv2.imwrite(frame_path, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-    return output_folder
-
-def extract_audio(video_path, audio_path="temp_audio.wav"):
-    with VideoFileClip(video_path) as clip:
+from PIL import Image
+
+import metrics
+from scratch import scratch_dir
+from face_crops import FaceTracker
+from inference_backend import INFERENCE_BACKEND, load_pipeline
+from model_registry import registry
+from video_cache import download_video
+
+# --- CONFIGURATION ---
+FACE_MODEL_ID = "prithivMLmods/Deep-Fake-Detector-v2-Model"
+AUDIO_MODEL_ID = "MelodyMachine/Deepfake-audio-detection-V2"
+# Bump the revision whenever the decision logic changes so cached verdicts are not reused.
+ANALYZER_VERSION = f"{FACE_MODEL_ID}+{AUDIO_MODEL_ID}:4"
+# Quantized and ONNX models score slightly differently, so their verdicts are cached separately.
+if INFERENCE_BACKEND != "torch":
+    ANALYZER_VERSION += f"/{INFERENCE_BACKEND}"
+# Number of frames sent to the face classifier per pipeline call.
+FACE_BATCH_SIZE = int(os.getenv("FACE_BATCH_SIZE", "16"))
+# Classify aligned face crops (see face_crops.py) instead of whole frames; frames without faces are skipped.
+FACE_CROP_ENABLED = os.getenv("FACE_CROP_ENABLED", "1").lower() in ("1", "true", "yes")
+# Frames decoded per second; SceneSampler then keeps only the ones that look new.
+VIDEO_DECODE_FPS = float(os.getenv("VIDEO_DECODE_FPS", "1"))
+# Bhattacharyya distance between colour histograms that counts as a scene change (0 keeps every frame).
+SCENE_CHANGE_THRESHOLD = float(os.getenv("SCENE_CHANGE_THRESHOLD", "0.3"))
+# Keep at least one frame this often, even in a static shot.
+SCENE_MAX_GAP_SECONDS = float(os.getenv("SCENE_MAX_GAP_SECONDS", "5"))
+# Early stopping: after FACE_MIN_FRAMES, stop once the majority label is significant and the
+# mean score is known to within +/- FACE_SCORE_TOLERANCE; never classify more than FACE_MAX_FRAMES.
+FACE_MIN_FRAMES = int(os.getenv("FACE_MIN_FRAMES", "16"))
+FACE_MAX_FRAMES = int(os.getenv("FACE_MAX_FRAMES", "300"))
+FACE_SCORE_TOLERANCE = float(os.getenv("FACE_SCORE_TOLERANCE", "0.05"))
+CONFIDENCE_Z = 1.96
+# Sample rate the audio track is resampled to before it reaches audio_detector.
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+# Long tracks are classified in fixed windows, AUDIO_WINDOW_BATCH per pipeline call, with at most
+# AUDIO_WINDOW_WORKERS batches in flight, so memory stays bounded however long the track is.
+AUDIO_WINDOW_SECONDS = float(os.getenv("AUDIO_WINDOW_SECONDS", "4"))
+AUDIO_WINDOW_BATCH = int(os.getenv("AUDIO_WINDOW_BATCH", "8"))
+AUDIO_WINDOW_WORKERS = int(os.getenv("AUDIO_WINDOW_WORKERS", "2"))
+# A single window scored synthetic at or above this marks the whole track, and stops the scan.
+AUDIO_SYNTHETIC_SCORE = float(os.getenv("AUDIO_SYNTHETIC_SCORE", "0.9"))
+AUDIO_GENUINE_LABEL = "bonafide"
+
+# --- MODELS ---
+# Both pipelines live in the shared model registry; they load on first use or at server start.
+def _warm_up_face(detector):
+    detector([Image.new("RGB", (224, 224))], batch_size=1)
+
+def _warm_up_audio(detector):
+    detector({"raw": np.zeros(AUDIO_SAMPLE_RATE, dtype=np.float32), "sampling_rate": AUDIO_SAMPLE_RATE})
+
+registry.register("face_detector", lambda: load_pipeline("image-classification", FACE_MODEL_ID), _warm_up_face)
+registry.register("audio_detector", lambda: load_pipeline("audio-classification", AUDIO_MODEL_ID), _warm_up_audio)
+
+class AnalysisCancelled(Exception):
+    """Raised inside an analysis once its cancel event is set (e.g. the client went away)."""
+
+def _check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise AnalysisCancelled("The analysis was cancelled.")
+
+def download_youtube_video(url, workdir, sections=None):
+    """Copies the video into the caller's scratch directory (via the download cache) and returns its path."""
+    return download_video(url, workdir, sections)
+
+@contextmanager
+def demux_video(video_path, fps=1, sample_rate=AUDIO_SAMPLE_RATE):
+    """
+    Opens the container once and yields both branches: an iterator of sampled RGB
+    frames and an iterator of mono float32 PCM blocks (None if there is no audio).
+    Both are lazy, so neither track is ever held in memory in full.
+    """
+    with VideoFileClip(video_path, audio_fps=sample_rate) as clip:
+        audio = None
         if clip.audio:
-            clip.audio.write_audiofile(audio_path, logger=None)
-            return audio_path
-    return None
+            audio = (_to_mono(chunk) for chunk in clip.audio.iter_chunks(fps=sample_rate, chunk_duration=10))
+        yield clip.iter_frames(fps=fps), audio
 
-def check_face(frames_folder):
-    load_models() # Ensure models are loaded before use
-    if not face_detector:
-        return "error", 0.0, "Face detection model is not available."
+def _to_mono(samples):
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    return samples.astype(np.float32)
 
-    scores, labels = [], []
-    image_files = [f for f in os.listdir(frames_folder) if f.endswith(('.jpg', '.png'))]
-    if not image_files:
-        return "neutral", 0.0, "No frames to analyze"
+def read_audio_blocks(audio_path, sample_rate=AUDIO_SAMPLE_RATE, block_seconds=10):
+    """Reads an audio file block by block, as mono float32 PCM resampled to sample_rate."""
+    try:
+        native_rate = sf.info(audio_path).samplerate
+    except RuntimeError:
+        # Formats libsndfile cannot stream (e.g. some mp3/m4a) are decoded in one go instead.
+        yield librosa.load(audio_path, sr=sample_rate, mono=True)[0]
+        return
+    for block in sf.blocks(audio_path, blocksize=int(native_rate * block_seconds), dtype="float32", always_2d=True):
+        block = _to_mono(block)
+        if native_rate != sample_rate:
+            block = librosa.resample(block, orig_sr=native_rate, target_sr=sample_rate)
+        yield block
 
-    for frame_file in image_files:
-        img_path = os.path.join(frames_folder, frame_file)
-        preds = face_detector(img_path)
-        best = max(preds, key=lambda x: x['score'])
-        labels.append(best['label'])
-        scores.append(best['score'])
+def audio_windows(blocks, window_size):
+    """Re-slices a stream of PCM blocks into consecutive windows of window_size samples."""
+    buffer = np.empty(0, dtype=np.float32)
+    for block in blocks:
+        buffer = np.concatenate([buffer, block]) if buffer.size else block
+        while buffer.size >= window_size:
+            yield buffer[:window_size]
+            buffer = buffer[window_size:]
+    if buffer.size:
+        yield buffer
 
+class SceneSampler:
+    """
+    Wraps a frame iterator and passes on only frames whose colour histogram differs from
+    the last kept frame, plus one every max_gap_seconds. Counts every frame it decodes.
+    """
+
+    def __init__(self, frames, fps=VIDEO_DECODE_FPS, threshold=SCENE_CHANGE_THRESHOLD,
+                 max_gap_seconds=SCENE_MAX_GAP_SECONDS):
+        self.frames = frames
+        self.fps = fps
+        self.threshold = threshold
+        self.max_gap_seconds = max_gap_seconds
+        self.decoded = 0
+
+    def __iter__(self):
+        last_hist = None
+        last_kept = None
+        for frame in self.frames:
+            t = self.decoded / self.fps
+            self.decoded += 1
+            small = cv2.resize(frame, (64, 64), interpolation=cv2.INTER_AREA)
+            hsv = cv2.cvtColor(small, cv2.COLOR_RGB2HSV)
+            hist = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+            cv2.normalize(hist, hist)
+            if (last_hist is None
+                    or t - last_kept >= self.max_gap_seconds
+                    or cv2.compareHist(last_hist, hist, cv2.HISTCMP_BHATTACHARYYA) >= self.threshold):
+                last_hist, last_kept = hist, t
+                yield frame
+
+def _summarize_face_predictions(labels, scores):
     avg_score = sum(scores) / len(scores) if scores else 0
     majority_label = max(set(labels), key=labels.count) if labels else "neutral"
     reason = f"Face analysis determined the majority of frames as '{majority_label.upper()}'."
     return majority_label, avg_score, reason
 
-def check_audio(audio_path):
-    load_models() # Ensure models are loaded before use
+def check_face_frames(frames, batch_size=FACE_BATCH_SIZE, min_frames=FACE_MIN_FRAMES,
+                      max_frames=FACE_MAX_FRAMES, tolerance=FACE_SCORE_TOLERANCE, crop_faces=FACE_CROP_ENABLED,
+                      on_batch=None, cancel=None):
+    """
+    Classifies decoded frames in batches without writing them to disk, and stops pulling
+    frames once the verdict has settled. Returns the majority label, mean score and reason,
+    plus one score per classified frame (per face when crop_faces is on). Tracked faces whose
+    crop did not change reuse the earlier prediction; they are listed with reused=True but
+    are not counted as samples for the verdict, the settle check or max_frames.
+    on_batch(fresh_scores, new_fresh_scores) is called after every classified batch; setting
+    the cancel event stops decoding and raises AnalysisCancelled.
+    """
+    face_detector = registry.get("face_detector")
+    if not face_detector:
+        return "error", 0.0, "Face detection model is not available.", []
+
+    tracker = FaceTracker() if crop_faces else None
+    frame_scores, fresh = [], []
+    # Images waiting for the classifier, each with the dict its prediction is written into,
+    # and the observations (frame, face, prediction dict) that become frame_scores on flush.
+    pending, observations = [], []
+    def flush():
+        recorded = len(frame_scores)
+        _classify_face_batch(face_detector, pending, observations, batch_size, frame_scores)
+        new_fresh = [f for f in frame_scores[recorded:] if not f.get('reused')]
+        fresh.extend(new_fresh)
+        if on_batch and new_fresh:
+            on_batch(fresh, new_fresh)
+
+    for frame_index, frame in enumerate(frames):
+        _check_cancelled(cancel)
+        if tracker is None:
+            prediction = {}
+            pending.append((prediction, Image.fromarray(frame)))
+            observations.append((frame_index, None, prediction, False))
+        else:
+            with metrics.span("face_detection"):
+                tracks = tracker.update(frame)
+            for track, crop, changed in tracks:
+                if changed:
+                    track.prediction = {}
+                    pending.append((track.prediction, Image.fromarray(crop)))
+                observations.append((frame_index, track.id, track.prediction, not changed))
+        if len(pending) >= min(batch_size, max_frames - len(fresh)) or len(observations) >= batch_size:
+            flush()
+            pending, observations = [], []
+            if len(fresh) >= max_frames or _face_verdict_settled(fresh, min_frames, tolerance):
+                break
+    if observations:
+        _check_cancelled(cancel)
+        flush()
+
+    if not fresh:
+        if tracker is not None:
+            return "neutral", 0.0, "No faces were detected in the sampled frames.", []
+        return "neutral", 0.0, "No frames to analyze", []
+
+    labels = [f['label'] for f in fresh]
+    scores = [f['score'] for f in fresh]
+    majority_label, avg_score, reason = _summarize_face_predictions(labels, scores)
+    return majority_label, avg_score, reason, frame_scores
+
+def _face_verdict_settled(frame_scores, min_frames, tolerance):
+    """True once more frames are unlikely to flip the majority label or move the mean score."""
+    n = len(frame_scores)
+    if n < min_frames:
+        return False
+    majority_share = Counter(f['label'] for f in frame_scores).most_common(1)[0][1] / n
+    if majority_share - CONFIDENCE_Z * math.sqrt(majority_share * (1 - majority_share) / n) <= 0.5:
+        return False
+    scores = np.array([f['score'] for f in frame_scores])
+    return CONFIDENCE_Z * scores.std(ddof=1) / math.sqrt(n) <= tolerance
+
+def _classify_face_batch(face_detector, pending, observations, batch_size, frame_scores):
+    if pending:
+        with metrics.span("face_inference"):
+            batch_preds = face_detector([image for _, image in pending], batch_size=batch_size)
+        for (prediction, _), preds in zip(pending, batch_preds):
+            best = max(preds, key=lambda x: x['score'])
+            prediction.update(label=best['label'], score=best['score'])
+    for frame_index, face_id, prediction, reused in observations:
+        entry = {"frame": frame_index, "label": prediction['label'], "score": prediction['score']}
+        if face_id is not None:
+            entry.update(face=face_id, reused=reused)
+        frame_scores.append(entry)
+
+def check_audio(audio, sample_rate=AUDIO_SAMPLE_RATE, window_seconds=AUDIO_WINDOW_SECONDS,
+                batch_size=AUDIO_WINDOW_BATCH, workers=AUDIO_WINDOW_WORKERS, synthetic_score=AUDIO_SYNTHETIC_SCORE,
+                stop_early=True, cancel=None):
+    """
+    Classifies an audio file path, an in-memory mono PCM array or an iterator of PCM
+    blocks, window by window. Returns label, score and reason for the whole track plus
+    a timeline of per-window labels and scores. Scanning stops at the first window
+    that is confidently synthetic, since one spliced segment is enough to flag the track,
+    and raises AnalysisCancelled soon after the cancel event is set.
+    """
+    audio_detector = registry.get("audio_detector")
     if not audio_detector:
-        return "error", 0.0, "Audio detection model is not available."
-
-    if not audio_path or not os.path.exists(audio_path):
-        return "neutral", 0.0, "No audio track found in the video."
-    preds = audio_detector(audio_path)
-    best = max(preds, key=lambda x: x['score'])
-    reason = f"Audio analysis classified the track as '{best['label'].upper()}'."
-    return best['label'], best['score'], reason
-
-def analyze_video_from_url(url):
-    video_path = download_youtube_video(url)
-    # The functions below will trigger model loading if needed
-    frames_folder = extract_frames(video_path)
-    audio_path = extract_audio(video_path)
-
-    face_label, face_conf, face_reason = check_face(frames_folder)
-    audio_label, audio_conf, audio_reason = check_audio(audio_path)
-
-    shutil.rmtree(frames_folder)
-    if audio_path and os.path.exists(audio_path):
-        os.remove(audio_path)
-    if os.path.exists(video_path):
-        os.remove(video_path)
-
-    face_is_real = face_label.lower() == "real"
-    audio_is_real = audio_label.lower() == "bonafide"
-    overall_confidence = (face_conf + audio_conf) / 2 if audio_path else face_conf
-
-    if face_is_real and audio_is_real:
+        return "error", 0.0, "Audio detection model is not available.", []
+
+    if audio is None or (isinstance(audio, str) and not os.path.exists(audio)):
+        return "neutral", 0.0, "No audio track found in the video.", []
+    if isinstance(audio, str):
+        blocks = read_audio_blocks(audio, sample_rate)
+    elif isinstance(audio, np.ndarray):
+        blocks = [audio]
+    else:
+        blocks = audio
+
+    window_size = int(window_seconds * sample_rate)
+
+    def classify(batch):
+        inputs = [{"raw": samples, "sampling_rate": sample_rate} for _, _, samples in batch]
+        with metrics.span("audio_inference"):
+            batch_preds = audio_detector(inputs, batch_size=len(inputs))
+        return [(start, end, max(preds, key=lambda x: x['score'])) for (start, end, _), preds in
+                zip(batch, batch_preds)]
+
+    timeline, in_flight, batch = [], [], []
+    stopped = cancelled = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, samples in enumerate(audio_windows(blocks, window_size)):
+            cancelled = cancel is not None and cancel.is_set()
+            if cancelled:
+                break
+            # A tail under a quarter window is too short to judge on its own, unless it is the whole track.
+            if index > 0 and samples.size < window_size // 4:
+                break
+            start = index * window_seconds
+            batch.append((start, start + samples.size / sample_rate, samples))
+            if len(batch) == batch_size:
+                in_flight.append(pool.submit(metrics.propagate(classify), batch))
+                batch = []
+            # Keep at most `workers` batches in flight; collect the oldest before reading further.
+            if len(in_flight) >= workers:
+                stopped = _collect_audio_batch(in_flight.pop(0), timeline, synthetic_score) and stop_early
+                if stopped:
+                    break
+        if batch and not stopped and not cancelled:
+            in_flight.append(pool.submit(metrics.propagate(classify), batch))
+        for future in in_flight:
+            if stopped or cancelled:
+                future.cancel()
+            else:
+                stopped = _collect_audio_batch(future, timeline, synthetic_score) and stop_early
+    _check_cancelled(cancel)
+
+    if not timeline:
+        return "neutral", 0.0, "No audio track found in the video.", []
+    return _summarize_audio_timeline(timeline, synthetic_score, stopped) + (timeline,)
+
+def _collect_audio_batch(future, timeline, synthetic_score):
+    """Appends a finished batch to the timeline; True if it holds a confidently synthetic window."""
+    found = False
+    for start, end, best in future.result():
+        timeline.append({"start": round(start, 2), "end": round(end, 2),
+                         "label": best['label'], "score": best['score']})
+        found = found or (best['label'].lower() != AUDIO_GENUINE_LABEL and best['score'] >= synthetic_score)
+    return found
+
+def _summarize_audio_timeline(timeline, synthetic_score, stopped):
+    synthetic = [w for w in timeline if w['label'].lower() != AUDIO_GENUINE_LABEL and w['score'] >= synthetic_score]
+    if synthetic:
+        worst = max(synthetic, key=lambda w: w['score'])
+        reason = (f"Audio analysis found a synthetic segment at {worst['start']:.0f}s-{worst['end']:.0f}s "
+                  f"('{worst['label'].upper()}')")
+        reason += ", and stopped scanning there." if stopped else "."
+        return worst['label'], worst['score'], reason
+    labels = [w['label'] for w in timeline]
+    majority_label = max(set(labels), key=labels.count)
+    scores = [w['score'] for w in timeline if w['label'] == majority_label]
+    reason = f"Audio analysis classified {len(scores)} of {len(timeline)} windows as '{majority_label.upper()}'."
+    return majority_label, sum(scores) / len(scores), reason
+
+def _timed(stage, fn, *args, **kwargs):
+    started = time.perf_counter()
+    with metrics.span(stage):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def analyze_video_file(video_path, progress=None, events=None, cancel=None):
+    """
+    Decodes the video once and runs the face and audio branches side by side (torch
+    releases the GIL during inference), then combines them into one verdict.
+    events(name, data), if given, receives partial results: a "face" event with the running
+    majority label after every classified batch and an "audio" event with the audio verdict.
+    Setting the cancel event stops both branches and raises AnalysisCancelled.
+    """
+    if progress: progress("decoding")
+    started = time.perf_counter()
+    with demux_video(video_path, fps=VIDEO_DECODE_FPS) as (frames, audio):
+        if progress: progress("classifying")
+        sampler = SceneSampler(frames)
+
+        def face_batch(fresh_scores, new_scores):
+            label, confidence, _ = _summarize_face_predictions([f['label'] for f in fresh_scores],
+                                                               [f['score'] for f in fresh_scores])
+            events("face", {"label": label, "confidence": confidence, "frames_decoded": sampler.decoded,
+                            "frames_classified": len(fresh_scores), "frame_scores": new_scores})
+
+        def audio_branch():
+            audio_result = check_audio(audio, cancel=cancel)
+            if events:
+                label, confidence, reason, _ = audio_result
+                events("audio", {"label": label, "confidence": confidence, "reason": reason})
+            return audio_result
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            audio_future = pool.submit(metrics.propagate(_timed), "audio_branch", audio_branch)
+            # On cancellation the audio branch sees the same event and stops too.
+            face, face_seconds = _timed("face_branch", check_face_frames, sampler,
+                                        on_batch=face_batch if events else None, cancel=cancel)
+            audio_result, audio_seconds = audio_future.result()
+
+    result = combine_video_verdict(face, audio_result)
+    if "error" in result:
+        return result
+    result["details"]["face_analysis"].update(frames_decoded=sampler.decoded, frames_classified=sum(not f.get('reused') for f in face[3]))
+    result["details"]["timings"] = {
+        "face_seconds": round(face_seconds, 3),
+        "audio_seconds": round(audio_seconds, 3),
+        "analysis_seconds": round(time.perf_counter() - started, 3),
+    }
+    return result
+
+def combine_video_verdict(face, audio):
+    """
+    Turns the (label, confidence, reason, scores) of both branches into the final verdict.
+    If either branch could not run (label "error"), returns {"error": ...} instead, so the
+    failure is neither cached nor recorded as a verdict.
+    """
+    face_label, face_conf, face_reason, frame_scores = face
+    audio_label, audio_conf, audio_reason, audio_timeline = audio
+    errors = [reason for label, _, reason, _ in (face, audio) if label.lower() == "error"]
+    if errors:
+        return {"error": " ".join(errors)}
+    # A branch with nothing to look at ("neutral": no faces, or no audio track) offers no evidence
+    # either way, so the verdict and confidence rest on the other branch alone.
+    face_found = face_label.lower() != "neutral"
+    audio_found = audio_label.lower() != "neutral"
+    face_is_real = face_label.lower() in ("real", "neutral")
+    audio_is_real = audio_label.lower() in ("bonafide", "neutral")
+    confidences = [conf for found, conf in ((face_found, face_conf), (audio_found, audio_conf)) if found]
+    overall_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+
+    if not face_found and not audio_found:
+        decision = "Uncertain"
+        final_reason = "Neither faces nor an audio track were found to analyze."
+    elif face_is_real and audio_is_real:
         decision = "Real"
         final_reason = "Both visual and audio components appear authentic."
-    # ... (rest of the logic is the same)
     elif not face_is_real and audio_is_real:
         decision = "Fake"
         final_reason = "Altered visual content (deepfake face) detected, but audio is authentic."
@@ -126,7 +420,28 @@ def analyze_video_from_url(url):
         "overall_confidence": overall_confidence,
         "reason": final_reason,
         "details": {
-            "face_analysis": {"result": face_label, "confidence": face_conf, "reason": face_reason},
-            "audio_analysis": {"result": audio_label, "confidence": audio_conf, "reason": audio_reason},
+            "face_analysis": {
+                "result": face_label, "confidence": face_conf, "reason": face_reason, "frame_scores": frame_scores
+            },
+            "audio_analysis": {
+                "result": audio_label, "confidence": audio_conf, "reason": audio_reason, "timeline": audio_timeline
+            },
         }
     }
+
+def analyze_video_from_url(url, progress=None, sections=None, events=None, cancel=None):
+    # Checked (and loaded if not preloaded) before spending a download and a decode on the video.
+    if not registry.get("face_detector") or not registry.get("audio_detector"):
+        raise RuntimeError("Video analysis models are not available.")
+    with scratch_dir() as workdir:
+        if progress: progress("downloading")
+        video_path, download_seconds = _timed("video_download", download_youtube_video, url, workdir, sections)
+        # A download in progress is not interrupted (other requests may be waiting on it), so
+        # cancellation takes effect once it has finished.
+        _check_cancelled(cancel)
+        if events: events("download", {"seconds": round(download_seconds, 3)})
+        result = analyze_video_file(video_path, progress, events, cancel)
+    if "error" in result:
+        return result
+    result["details"]["timings"]["download_seconds"] = round(download_seconds, 3)
+    return result
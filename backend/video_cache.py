@@ -0,0 +1,161 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import yt_dlp
+from yt_dlp.utils import download_range_func
+
+import metrics
+from result_cache import canonicalize_url
+
+# --- CONFIGURATION ---
+# Frames are classified at 224x224, so anything much above this only costs bandwidth.
+VIDEO_MIN_HEIGHT = int(os.getenv("VIDEO_MIN_HEIGHT", "360"))
+# Download only the first N seconds of each video (0 downloads all of it).
+VIDEO_MAX_SECONDS = float(os.getenv("VIDEO_MAX_SECONDS", "0"))
+VIDEO_CACHE_DIR = os.getenv("VIDEO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "veritas-videos"))
+VIDEO_CACHE_MAX_BYTES = int(os.getenv("VIDEO_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# file:// URLs let a local file stand in for a remote video in tests. Never enable in production:
+# it would let any client read files off the server.
+VIDEO_ALLOW_FILE_URLS = os.getenv("VIDEO_ALLOW_FILE_URLS", "0").lower() in ("1", "true", "yes")
+
+LOOKUPS = metrics.Counter("veritas_video_cache_lookups_total", "Downloaded-video cache lookups by outcome.",
+                          ("outcome",))
+
+
+def normalize_sections(sections=None, max_seconds=VIDEO_MAX_SECONDS):
+    """Returns the [start, end] ranges to download, or None for the whole video."""
+    if sections:
+        ranges = sorted((float(start), float(end)) for start, end in sections)
+        if any(start < 0 or end <= start for start, end in ranges):
+            raise ValueError("Each section must be [start, end] seconds with 0 <= start < end.")
+        return [list(r) for r in ranges]
+    if max_seconds:
+        return [[0.0, float(max_seconds)]]
+    return None
+
+
+class VideoDownloader:
+    """
+    Downloads videos at the lowest resolution that still meets min_height, and keeps
+    them in a size-bounded on-disk LRU keyed by canonical URL and requested sections.
+    """
+
+    def __init__(self, cache_dir=VIDEO_CACHE_DIR, max_bytes=VIDEO_CACHE_MAX_BYTES, min_height=VIDEO_MIN_HEIGHT,
+                 allow_file_urls=VIDEO_ALLOW_FILE_URLS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.min_height = min_height
+        self.allow_file_urls = allow_file_urls
+        # Striped locks: one download per video at a time without a lock object per video ever seen.
+        self._locks = [threading.Lock() for _ in range(64)]
+        # Cache-wide lock around taking a cached file and evicting, so eviction for one video
+        # never deletes a file another request is about to link.
+        self._cache_lock = threading.Lock()
+
+    def fetch(self, url, workdir, sections=None):
+        """Places the video in workdir (from the cache when possible) and returns its path."""
+        if url.lower().startswith("file:") and not self.allow_file_urls:
+            raise ValueError("file:// URLs are disabled.")
+        key = self._cache_key(url, sections)
+        cached_path = os.path.join(self.cache_dir, f"{key}.mp4")
+        output_path = os.path.join(workdir, "downloaded_video.mp4")
+        # Other requests for the same video wait here and then hit the cache.
+        with self._locks[int(key[:8], 16) % len(self._locks)]:
+            if self._take(cached_path, output_path):
+                LOOKUPS.inc(outcome="hit")
+            else:
+                LOOKUPS.inc(outcome="miss")
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Download into a private directory first so a half-written file never lands in the cache.
+                staging = tempfile.mkdtemp(dir=self.cache_dir, prefix=".download-")
+                try:
+                    downloaded = self._download(url, sections, staging)
+                    self._take(cached_path, output_path, downloaded)
+                finally:
+                    shutil.rmtree(staging, ignore_errors=True)
+                self._evict(keep=cached_path)
+        return output_path
+
+    def _take(self, cached_path, output_path, downloaded=None):
+        """
+        Links (or copies) a cached video to output_path; False if it is not cached.
+        A fresh download is moved into the cache under the same lock, so it cannot be
+        evicted before it is taken.
+        """
+        with self._cache_lock:
+            if downloaded is not None:
+                os.replace(downloaded, cached_path)
+            try:
+                os.utime(cached_path)  # mark as recently used
+            except FileNotFoundError:
+                return False
+            # A hard link keeps the caller's copy readable even if the cache evicts the file.
+            try:
+                os.link(cached_path, output_path)
+                return True
+            except OSError:
+                # An open handle does the same for the copy, which runs outside the lock.
+                source = open(cached_path, "rb")
+        with source, open(output_path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        return True
+
+    def _cache_key(self, url, sections):
+        identity = json.dumps([canonicalize_url(url), self.min_height, sections])
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def _download(self, url, sections, staging):
+        """Downloads the video into the staging directory and returns the file's path."""
+        ydl_opts = {
+            'format': f"bv*[height>={self.min_height}]+ba/b[height>={self.min_height}]/bv*+ba/b",
+            # Ascending resolution and size: the first format that passes the filter is the smallest.
+            'format_sort': ['+res', '+size', '+br'],
+            'merge_output_format': 'mp4',
+            'outtmpl': os.path.join(staging, 'video.%(ext)s'),
+            'quiet': True,
+            'noprogress': True,
+            'noplaylist': True,
+            'enable_file_urls': self.allow_file_urls,
+        }
+        if sections:
+            # Sections are cut by ffmpeg (the FFmpeg install step in the README), fetching only those ranges.
+            ydl_opts['download_ranges'] = download_range_func(None, sections)
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.download([url])
+        downloaded = [name for name in os.listdir(staging) if not name.endswith(".part")]
+        if not downloaded:
+            raise RuntimeError("The video could not be downloaded.")
+        return os.path.join(staging, downloaded[0])
+
+    def _evict(self, keep):
+        """Deletes least recently used videos until the cache fits in max_bytes."""
+        with self._cache_lock:
+            self._evict_locked(keep)
+
+    def _evict_locked(self, keep):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".mp4"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                print(f"Video cache eviction failed: {e}")
+
+
+_downloader = VideoDownloader()
+
+
+def download_video(url, workdir, sections=None):
+    return _downloader.fetch(url, workdir, normalize_sections(sections))
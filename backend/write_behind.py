@@ -0,0 +1,116 @@
+import os
+import time
+import queue
+import atexit
+import threading
+
+import metrics
+
+# --- CONFIGURATION ---
+# Rows wait at most RECORDER_FLUSH_SECONDS, and are written RECORDER_BATCH_SIZE per transaction.
+RECORDER_BATCH_SIZE = int(os.getenv("RECORDER_BATCH_SIZE", "200"))
+RECORDER_FLUSH_SECONDS = float(os.getenv("RECORDER_FLUSH_SECONDS", "0.2"))
+RECORDER_QUEUE_SIZE = int(os.getenv("RECORDER_QUEUE_SIZE", "10000"))
+# How long a request waits for room in a full queue before writing its row itself.
+RECORDER_PUT_TIMEOUT = float(os.getenv("RECORDER_PUT_TIMEOUT", "1.0"))
+
+QUEUED = metrics.Gauge("veritas_recorder_queue_depth", "Rows waiting for the write-behind recorder.")
+FLUSHED = metrics.Counter("veritas_recorder_rows_total", "Rows handled by the write-behind recorder.", ("outcome",))
+
+_STOP = object()
+
+
+class WriteBehindRecorder:
+    """
+    Takes rows off the request path: record() only queues them, and a background thread
+    hands them to flush(rows) in batches, one transaction per batch. The queue is bounded;
+    when it stays full, record() falls back to flushing the row on the caller's thread.
+    The thread starts with the first record() in each process, so an instance created
+    before gunicorn forks its workers still writes from every worker.
+    """
+
+    def __init__(self, flush, batch_size=RECORDER_BATCH_SIZE, flush_seconds=RECORDER_FLUSH_SECONDS,
+                 max_queue=RECORDER_QUEUE_SIZE, put_timeout=RECORDER_PUT_TIMEOUT):
+        self.flush = flush
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.put_timeout = put_timeout
+        self.max_queue = max_queue
+        self._closed = False
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self.close)
+
+    def _reset(self):
+        # A forked child inherits neither the thread nor a usable queue, and must not
+        # write the rows its parent still had queued.
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="veritas-recorder", daemon=True)
+                self._thread.start()
+
+    def record(self, *rows):
+        if self._closed:
+            self._flush(list(rows))
+            return
+        if self._thread is None:
+            self._start()
+        for row in rows:
+            try:
+                self._queue.put(row, timeout=self.put_timeout)
+                QUEUED.inc()
+            except queue.Full:
+                self._flush([row])
+
+    def close(self):
+        """Writes out everything still queued; called at interpreter exit."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            stopping = item is _STOP
+            batch = [] if stopping else [item]
+            # Give more rows up to flush_seconds to arrive, so they share one transaction.
+            deadline = time.monotonic() + self.flush_seconds
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            if batch:
+                QUEUED.dec(len(batch))
+                self._flush(batch)
+            if stopping:
+                # Rows queued after close() began are flushed here too.
+                rest = []
+                while not self._queue.empty():
+                    rest.append(self._queue.get_nowait())
+                if rest:
+                    QUEUED.dec(len(rest))
+                    self._flush(rest)
+                return
+
+    def _flush(self, rows):
+        try:
+            with metrics.span("db_flush"):
+                self.flush(rows)
+            FLUSHED.inc(len(rows), outcome="written")
+        except Exception as e:
+            FLUSHED.inc(len(rows), outcome="dropped")
+            print(f"Write-behind flush of {len(rows)} rows failed: {e}")
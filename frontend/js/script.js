@@ -244,7 +244,7 @@ document.addEventListener("DOMContentLoaded", () => {
         analyzeBtn.addEventListener('click', () => {
             if (urlInput.value) {
                 const body = { url: urlInput.value };
-                performAnalysis(`${API_BASE_URL}/analyze/video-url`, {
+                performStreamingAnalysis(`${API_BASE_URL}/analyze/video-url`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(body),
@@ -252,7 +252,7 @@ document.addEventListener("DOMContentLoaded", () => {
             } else if (fileInput.files.length > 0) {
                 const formData = new FormData();
                 formData.append('file', fileInput.files[0]);
-                performAnalysis(`${API_BASE_URL}/analyze/video-file`, {
+                performStreamingAnalysis(`${API_BASE_URL}/analyze/video-file`, {
                     method: 'POST',
                     body: formData,
                 });
@@ -284,6 +284,79 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     }
 
+    // Video analyses stream Server-Sent Events (stream=1), so the running verdict shows while frames
+    // are classified. EventSource cannot POST, so the stream is read from fetch() directly.
+    async function performStreamingAnalysis(endpoint, options) {
+        const resultsSection = document.getElementById('results-section');
+        const loader = document.getElementById('loader');
+        const progress = document.getElementById('stream-progress');
+        const statusEl = document.getElementById('stream-status');
+        const cancelBtn = document.getElementById('cancel-analysis-btn');
+        const controller = new AbortController();
+        const status = { stage: 'queued', face: '', audio: '' };
+        const showStatus = () => {
+            statusEl.textContent = [`Stage: ${status.stage}`, status.face, status.audio].filter(Boolean).join(' · ');
+        };
+
+        resultsSection.style.display = 'none';
+        loader.style.display = 'block';
+        progress.style.display = 'block';
+        showStatus();
+        // Aborting the request closes the connection; the server then stops the analysis.
+        cancelBtn.onclick = () => controller.abort();
+
+        const handleEvent = (name, data) => {
+            if (name === 'stage') {
+                status.stage = data.stage;
+            } else if (name === 'face') {
+                status.face = `Faces: ${data.label.toUpperCase()} (${Math.round(data.confidence * 100)}%) after ${data.frames_classified} frames`;
+            } else if (name === 'audio') {
+                status.audio = `Audio: ${data.label.toUpperCase()} (${Math.round(data.confidence * 100)}%)`;
+            } else if (name === 'result') {
+                displayResults(data);
+            } else if (name === 'error') {
+                throw new Error(data.error);
+            }
+            showStatus();
+        };
+
+        try {
+            const url = endpoint + (endpoint.includes('?') ? '&' : '?') + 'stream=1';
+            const response = await fetch(url, { ...options, signal: controller.signal });
+            if (!response.ok) {
+                const errorData = await response.json();
+                throw new Error(errorData.error || 'Analysis failed');
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                // Events are separated by a blank line; lines starting with ':' are keep-alives.
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const block = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let name = 'message';
+                    let data = '';
+                    for (const line of block.split('\n')) {
+                        if (line.startsWith('event: ')) name = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    }
+                    if (data) handleEvent(name, JSON.parse(data));
+                }
+            }
+        } catch (error) {
+            displayError(error.name === 'AbortError' ? 'Analysis cancelled.' : error.message);
+        } finally {
+            loader.style.display = 'none';
+            progress.style.display = 'none';
+            cancelBtn.onclick = null;
+        }
+    }
+
     function displayResults(data) {
         const resultsSection = document.getElementById('results-section');
         const decisionEl = document.getElementById('result-decision');
@@ -369,22 +442,25 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     }
 
-    async function fetchAndDisplayHistory() {
+    async function fetchAndDisplayHistory(cursor = null) {
         try {
-            const response = await fetch(`${API_BASE_URL}/history`);
+            const params = new URLSearchParams({ limit: 100 });
+            if (cursor) params.set('cursor', cursor);
+            const response = await fetch(`${API_BASE_URL}/history?${params}`);
             if (!response.ok) throw new Error('Network response was not ok');
             const historyData = await response.json();
             const tableBody = document.querySelector("#history-table tbody");
+            const loadMoreBtn = document.getElementById('history-load-more');
             if (!tableBody) return;
             
-            tableBody.innerHTML = '';
+            if (!cursor) tableBody.innerHTML = '';
             
-            if (historyData.length === 0) {
+            if (!cursor && historyData.items.length === 0) {
                   tableBody.innerHTML = '<tr><td colspan="4" style="text-align:center;">No history found.</td></tr>';
                   return;
             }
 
-            historyData.forEach(item => {
+            historyData.items.forEach(item => {
                 const row = document.createElement('tr');
                 const resultClass = item.result.toLowerCase().includes('fake') ? 'result-fake' : 'result-real';
 
@@ -394,8 +470,15 @@ document.addEventListener("DOMContentLoaded", () => {
                     <td>${(item.confidence * 100).toFixed(2)}%</td>
                     <td>${item.timestamp}</td>
                 `;
+                if (item.reason) row.title = item.reason;
                 tableBody.appendChild(row);
             });
+
+            // The server pages history with a cursor; only offer more when there is another page.
+            if (loadMoreBtn) {
+                loadMoreBtn.style.display = historyData.next_cursor ? 'block' : 'none';
+                loadMoreBtn.onclick = () => fetchAndDisplayHistory(historyData.next_cursor);
+            }
         } catch (error) {
             console.error("Failed to fetch history:", error);
         }